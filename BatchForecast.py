@@ -0,0 +1,97 @@
+import os
+import time
+import argparse
+import warnings
+from datetime import datetime
+from model_backend import load_model, load_scaler
+from features import get_features, closed_candles
+from forecasting import forecast_prices
+from artifacts import model_paths
+from forecast_cache import model_fingerprint
+from precomputed import result_path, save_result, point_manifest, load_manifest, PRECOMPUTED_DIR
+from utils import COINS
+import live_accuracy
+
+# Job batch (headless) untuk menghitung forecast 7 hari semua koin secara terjadwal.
+# Halaman Prediction cukup membaca hasilnya, tanpa import TensorFlow atau memanggil yfinance.
+# Model TFLite (ExportModels.py) dipakai jika tersedia.
+#
+# Contoh:
+#   python BatchForecast.py                # sekali jalan (cocok untuk cron)
+#   python BatchForecast.py --every 3600   # loop setiap 1 jam
+
+warnings.filterwarnings("ignore", category=UserWarning)
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+def run_ticker(ticker):
+    """Refresh data, hitung fitur dan forecast satu ticker. Dilewati jika hasilnya sudah ada."""
+    model_path, scaler_path = model_paths(ticker)
+    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+        print(f"Error Path: model/scaler {ticker} tidak ditemukan")
+        return None
+
+    df = get_features(ticker, interval="1d")
+    if df.empty:
+        print(f"Data kosong untuk {ticker}")
+        return None
+
+    # close harian baru -> perbarui window akurasi live dari forecast yang sudah tercatat
+    live_accuracy.update(ticker, df['Close'])
+
+    # Forecast dari candle terakhir yang sudah close: hasil di-key per candle, jadi candle hari ini yang
+    # masih berjalan akan membekukan forecast dari data setengah jadi sampai besok
+    df = closed_candles(df)
+    if df.empty:
+        print(f"Belum ada candle yang close untuk {ticker}")
+        return None
+    last_ts = df.index[-1]
+    fingerprint = model_fingerprint(ticker)
+    path = result_path(ticker, last_ts, fingerprint)
+
+    # Idempoten: kalau job sebelumnya sudah menulis hasil untuk candle & model yang sama, lewati
+    if os.path.exists(path):
+        # (manifest tetap diarahkan ulang, kalau job sebelumnya terhenti sebelum sempat menulisnya)
+        print(f"{ticker}: hasil untuk candle {last_ts:%Y-%m-%d} sudah ada, dilewati")
+        point_manifest(ticker, path)
+        return path
+
+    model = load_model(ticker)
+    scaler = load_scaler(ticker)
+    forecast = forecast_prices(model, scaler, df)
+
+    path = save_result(ticker, last_ts, fingerprint, forecast)
+    live_accuracy.log_forecast(ticker, forecast, fingerprint)
+    print(f"{ticker}: forecast disimpan di {path}")
+    return path
+
+
+def run_all():
+    print("\n" + "=" * 70)
+    print(f"BATCH FORECAST {datetime.now():%Y-%m-%d %H:%M:%S}")
+    print("=" * 70)
+
+    start = time.time()
+    # Universe bisa ratusan koin, hanya yang punya model yang di-forecast
+    for ticker in [t for t in COINS if os.path.exists(model_paths(t)[0])]:
+        try:
+            run_ticker(ticker)
+        except Exception as e:
+            # satu koin gagal tidak menghentikan koin lain; akan dicoba lagi di jadwal berikutnya
+            print(f"CRITICAL ERROR pada {ticker}: {e}")
+
+    print(f"Selesai dalam {time.time() - start:.1f} detik. Manifest: {os.path.join(PRECOMPUTED_DIR, 'latest.json')}")
+    print(f"Ticker tersedia: {', '.join(sorted(load_manifest()['tickers']))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute forecast 7 hari untuk semua koin")
+    parser.add_argument("--every", type=int, default=0,
+                        help="Jalankan ulang setiap N detik (0 = sekali jalan)")
+    args = parser.parse_args()
+
+    while True:
+        run_all()
+        if args.every <= 0:
+            break
+        time.sleep(args.every)
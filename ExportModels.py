@@ -0,0 +1,88 @@
+import os
+import sys
+import argparse
+import warnings
+import numpy as np
+import tensorflow as tf
+from artifacts import model_paths, build_bundle
+from model_backend import TFLiteModel, tflite_path
+from features import FEATURES, LOOKBACK
+
+# Konversi models/<ticker>_best_model.keras -> models/<ticker>_best_model.tflite
+# lalu cek paritas output TFLite vs Keras. Artefak hanya ditulis jika lolos cek paritas.
+#
+# Contoh:
+#   python ExportModels.py                 # semua koin
+#   python ExportModels.py BTC-USD ETH-USD
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Selisih absolut maksimum output (ruang ter-scale) yang masih dianggap sama
+PARITY_TOL = 1e-4
+PARITY_SAMPLES = 256
+
+
+def to_unrolled(model):
+    """LSTM di-unroll agar bisa dikonversi ke op TFLite bawaan dengan batch dinamis"""
+    config = model.get_config()
+    for layer in config['layers']:
+        if layer['class_name'] == 'LSTM':
+            layer['config']['unroll'] = True
+    unrolled = model.__class__.from_config(config)
+    unrolled.set_weights(model.get_weights())
+    return unrolled
+
+
+def parity_check(keras_model, lite_model, n_samples=PARITY_SAMPLES, seed=0):
+    """Bandingkan output kedua model pada window acak di rentang MinMaxScaler [0, 1]"""
+    rng = np.random.default_rng(seed)
+    X = rng.random((n_samples, LOOKBACK, len(FEATURES)), dtype=np.float32)
+    expected = keras_model.predict(X, verbose=0)
+    actual = lite_model.predict(X)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def export_ticker(ticker):
+    model_path, _ = model_paths(ticker)
+    if not os.path.exists(model_path):
+        print(f"Error Path: File tidak ditemukan di {model_path}")
+        return False
+
+    model = tf.keras.models.load_model(model_path)
+    lite_bytes = tf.lite.TFLiteConverter.from_keras_model(to_unrolled(model)).convert()
+
+    out_path = tflite_path(ticker)
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(lite_bytes)
+
+    # runtime kecil jika ada, kalau tidak pakai interpreter bawaan TensorFlow
+    try:
+        lite_model = TFLiteModel(tmp_path)
+    except ImportError:
+        lite_model = TFLiteModel(tmp_path, interpreter_class=tf.lite.Interpreter)
+
+    max_diff = parity_check(model, lite_model)
+    if max_diff > PARITY_TOL:
+        os.remove(tmp_path)
+        print(f"{ticker}: GAGAL cek paritas (selisih maks {max_diff:.2e} > {PARITY_TOL:.0e}), artefak tidak ditulis")
+        return False
+
+    os.replace(tmp_path, out_path)
+    print(f"{ticker}: {out_path} ({len(lite_bytes) / 1024:.0f} KB), selisih maks vs Keras {max_diff:.2e}")
+
+    # hash artefak baru ikut dicatat di bundle (fingerprint forecast cache berubah)
+    build_bundle(ticker)
+    return True
+
+
+if __name__ == "__main__":
+    from utils import COINS
+
+    parser = argparse.ArgumentParser(description="Export model Keras ke TFLite + cek paritas")
+    parser.add_argument("tickers", nargs="*", default=[t for t in COINS if os.path.exists(model_paths(t)[0])])
+    args = parser.parse_args()
+
+    results = {ticker: export_ticker(ticker) for ticker in args.tickers}
+    if not all(results.values()):
+        sys.exit(1)
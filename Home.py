@@ -1,6 +1,10 @@
+import os
 import streamlit as st
 import pandas as pd
-from utils import get_market_summary, format_big_number, format_price
+from datetime import datetime
+from utils import get_market_summary, build_market_table_html, format_price, sort_and_page, SORT_KEYS, FEATURED_COINS
+from model_registry import get_registry
+from price_stream import get_stream, overlay_prices
 
 # config page
 st.set_page_config(
@@ -81,6 +85,7 @@ st.markdown("""
     .styled-table td:first-child { text-align: left; font-weight: bold; display: flex; align-items: center; gap: 8px;}
     
     .ticker-symbol { color: #8B949E; font-size: 0.8em; margin-left: 5px; }
+    .stale-badge { color: #E3B341; font-size: 0.75em; margin-left: 5px; }
 
     /* Footer Disclaimer */
     .footer-disclaimer {
@@ -109,6 +114,9 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# mulai warm-up model populer (MODEL_WARMUP) di background, sebelum user membuka halaman Prediction
+get_registry()
+
 # load data
 with st.spinner("Loading market data..."):
     data, last_updated = get_market_summary()
@@ -127,21 +135,31 @@ with col2:
     st.markdown(f"""<p style='text-align: right; color: #8B949E; margin-top:20px;'>Last Updated: {last_updated}</p>""",
                 unsafe_allow_html=True)
     
-# CARDS (ROW 1)
-if not data:
-    st.error("Gagal mengambil data. Cek koneksi internet.")
-else:
-    cols = st.columns(len(data))
-    for i, item in enumerate(data):
+# Harga live: fragment di bawah di-rerun sendiri setiap LIVE_REFRESH detik (0 = mati) dan hanya membaca
+# ring buffer price_stream, tanpa menjalankan ulang seluruh halaman (CSS, header, summary)
+LIVE_REFRESH = float(os.environ.get("HOME_REFRESH_SECONDS", "5")) or None
+
+@st.fragment(run_every=LIVE_REFRESH)
+def live_market(data):
+    stream = get_stream()
+    by_ticker = {item['Ticker']: item for item in data}
+    featured_rows = [by_ticker[t] for t in FEATURED_COINS if t in by_ticker and not by_ticker[t].get("Pending")]
+
+    # CARDS (ROW 1)
+    # Kartu hanya untuk koin unggulan, jumlahnya tetap berapapun besar universe
+    featured = overlay_prices(featured_rows, stream.latest_prices(FEATURED_COINS))
+    cols = st.columns(max(1, len(featured)))
+    for i, item in enumerate(featured):
         color_class = "coin-change-up" if item["Change"] >= 0 else "coin-change-down"
         arrow = "▲" if item["Change"] >= 0 else "▼"
+        stale = "<span class='stale-badge' title='Data terakhir, gagal diperbarui'>stale</span>" if item.get("Stale") else ""
         
         with cols[i]:
             st.markdown(f"""
                 <div class="metric-card">
                     <div class="coin-header">
                         <img src="{item['Icon']}" class="coin-logo" onerror="this.style.display='none'">
-                        <span class="coin-name">{item['Ticker'].replace('-USD','')}</span>
+                        <span class="coin-name">{item['Ticker'].replace('-USD','')}</span>{stale}
                     </div>
                     <div>
                         <div class="coin-price">{format_price(item['Price'])}</div>
@@ -156,29 +174,46 @@ else:
                  st.session_state['selected_coin'] = item['Ticker']
                  st.switch_page("pages/Detail.py")
 
-# MARKET TABLE (ROW 2)
-st.markdown("###")
-table_html = '<table class="styled-table">'
-table_html += '<thead><tr><th style="text-align: left;">Asset</th><th style="text-align: right;">Price</th><th style="text-align: right;">24h Change</th><th style="text-align: right;">All-Time Low</th><th style="text-align: right;">Market Cap</th><th style="text-align: right;">Volume (24h)</th></tr></thead>'
-table_html += '<tbody>'
-
-for item in data:
-    change_color = "#00FF00" if item['Change'] >= 0 else "#FF4B4B"
-    table_html += f"""
-    <tr>
-        <td style="text-align: left;">
-            <img src="{item['Icon']}" style="width:20px; height:20px; border-radius:50%; vertical-align:middle; margin-right:5px;">
-            {item['Name']} <span class='ticker-symbol'>{item['Ticker'].replace('-USD','')}</span>
-        </td>
-        <td style="text-align: right;">{format_price(item['Price'])}</td>
-        <td style="text-align: right; color: {change_color};">{item['Change']:.2f}%</td>
-        <td style="text-align: right;">{format_price(item['ATL'])}</td>
-        <td style="text-align: right;">{format_big_number(item['MarketCap'])}</td>
-        <td style="text-align: right;">{format_big_number(item['Volume'])}</td>
-    </tr>"""
-
-table_html += '</tbody></table>'
-st.markdown(table_html, unsafe_allow_html=True)
+    # MARKET TABLE (ROW 2)
+    # Diurutkan & dipotong per halaman di server: hanya baris halaman aktif yang dikirim ke browser
+    st.markdown("###")
+    col_sort, col_order, col_size, col_page = st.columns([2, 1, 1, 1])
+    with col_sort:
+        sort_label = st.selectbox("Sort by", list(SORT_KEYS), index=0)
+    with col_order:
+        descending = st.radio("Order", ["Desc", "Asc"], horizontal=True) == "Desc"
+    with col_size:
+        page_size = st.selectbox("Rows per page", [25, 50, 100], index=0)
+    total_pages = max(1, -(-len(data) // page_size))
+    with col_page:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, step=1)
+
+    # Urutan halaman dari data summary (stabil antar tick); harga live hanya untuk baris yang tampil
+    page_rows, total_pages = sort_and_page(data, SORT_KEYS[sort_label], descending, int(page), page_size)
+    visible = [row['Ticker'] for row in page_rows]
+    stream.watch(FEATURED_COINS + visible)
+    page_rows = overlay_prices(page_rows, stream.latest_prices(visible))
+
+    table_html = build_market_table_html(page_rows)
+    st.markdown(table_html, unsafe_allow_html=True)
+    st.caption(f"{len(data)} aset, halaman {int(page)} dari {total_pages} · harga live {datetime.now():%H:%M:%S}")
+
+    # Analisis aset mana pun dari halaman yang sedang tampil
+    if page_rows:
+        names = {row['Ticker']: row['Name'] for row in page_rows}
+        col_pick, col_go = st.columns([3, 1])
+        with col_pick:
+            picked = st.selectbox("Analyze asset", list(names), format_func=lambda t: f"{names[t]} ({t})",
+                                  label_visibility="collapsed")
+        with col_go:
+            if st.button("Analyze", use_container_width=True):
+                st.session_state['selected_coin'] = picked
+                st.switch_page("pages/Detail.py")
+
+if not data:
+    st.error("Gagal mengambil data. Cek koneksi internet.")
+else:
+    live_market(data)
 
 # FOOTER
 st.markdown("""
@@ -1,18 +1,22 @@
 import os
-import time
+import io
 import sys
+import json
+import time
+import argparse
 import warnings
+import traceback
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
-import yfinance as yf
-import joblib
-import matplotlib.pyplot as plt
-from tensorflow.keras.models import load_model
 from sklearn.metrics import mean_squared_error, mean_absolute_error, mean_absolute_percentage_error
-import warnings
-import json
-
-metrics_dict = {}
+import model_backend
+from features import get_features, LOOKBACK
+from forecasting import HORIZON
+from backtest import walk_forward_paths, horizon_metrics
+import telemetry
+from telemetry import span
 
 # Matikan peringatan agar terminal bersih
 warnings.filterwarnings("ignore", category=UserWarning)
@@ -24,9 +28,7 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODELS_DIR = os.path.join(BASE_DIR, 'models')
 SCALERS_DIR = os.path.join(BASE_DIR, 'scalers')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'hasil_ujicobamodel')
-
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+METRICS_PATH = os.path.join(BASE_DIR, 'metrics.json')
 
 class DualLogger(object):
     def __init__(self, filename):
@@ -43,179 +45,258 @@ class DualLogger(object):
         self.terminal.flush()
         self.log.flush()
 
-# Aktifkan Pencatatan Otomatis
-log_filename = os.path.join(OUTPUT_DIR, "log_ujicobamodel.txt")
-sys.stdout = DualLogger(log_filename)
-
-print(f"Working Directory Script: {BASE_DIR}")
-print(f"Folder Models terdeteksi di: {MODELS_DIR}")
-print(f"Folder Scalers terdeteksi di: {SCALERS_DIR}")
-print(f"Gambar akan disimpan di: {OUTPUT_DIR}")
-
 # KONFIGURASI
 COINS = ["BTC-USD", "ETH-USD", "DOGE-USD", "SHIB-USD", "FLOKI-USD"]
 START_BUFFER = "2025-10-01"
 TEST_START   = "2026-01-01"
 TEST_END     = "2026-01-21"
 DOWNLOAD_END = "2026-01-25"
-LOOKBACK     = 60
+
+# Thread inferensi per worker: total thread ~ jumlah worker, tidak berebut core
+THREADS_PER_WORKER = 1
 
 # 1. FUNGSI AMBIL DATA & HITUNG INDIKATOR
 def get_data_with_indicators(ticker, start, end):
-    print(f"Downloading data {ticker}...")
-    df = yf.download(ticker, start=start, end=end, interval="1d", progress=False)
-    
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    
+    print(f"Mengambil data {ticker} dari store lokal...")
+    # Candle + indikator dari modul features (sama persis dengan dashboard)
+    df = get_features(ticker, start=start, end=end, interval="1d")
+
     if df.empty:
         raise ValueError(f"Data kosong untuk {ticker}")
 
-    # FEATURE ENGINEERING
-    # Log Return
-    df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
-    
-    # RSI
-    delta = df['Close'].diff()
-    gain = (delta.clip(lower=0)).rolling(window=14).mean()
-    loss = (-delta.clip(upper=0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-    
-    # MACD
-    ema12 = df['Close'].ewm(span=12, adjust=False).mean()
-    ema26 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = ema12 - ema26
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    
-    # ATR
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift(1))
-    low_close = np.abs(df['Low'] - df['Close'].shift(1))
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = np.max(ranges, axis=1)
-    df['ATR'] = true_range.rolling(window=14).mean()
-    
-    df.dropna(inplace=True)
     return df
 
-# EKSEKUSI PENGUJIAN UTAMA
-print("\n" + "="*70)
-print(f"MEMULAI PENGUJIAN VALIDASI MODEL (1-21 Jan 2026)")
-print("="*70)
+# 2. WORKER (satu ticker per task, berjalan di proses terpisah)
+def init_worker(threads=THREADS_PER_WORKER):
+    model_backend.configure_threads(threads)
+    # backend non-GUI: grafik di-render langsung ke file di tiap worker
+    import matplotlib
+    matplotlib.use("Agg")
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", category=FutureWarning)
 
-for ticker in COINS:
-    print(f"\nAnalisis Koin: {ticker}")
-    print("Jeda 3 detik agar aman dari blokir Yahoo Finance API...")
-    time.sleep(3) 
 
-    try:
-        # A. LOAD FILE PENTING
-        model_path = os.path.join(MODELS_DIR, f"{ticker}_best_model.keras")
-        scaler_path = os.path.join(SCALERS_DIR, f"{ticker}_scaler.pkl")
-        
-        if not os.path.exists(model_path):
-            print(f"Error Path: File tidak ditemukan di {model_path}")
-            continue
-            
-        model = load_model(model_path)
-        scaler = joblib.load(scaler_path)
-        
-        # B. AMBIL DATA LENGKAP
-        df_full = get_data_with_indicators(ticker, START_BUFFER, DOWNLOAD_END)
-        
-        # C. TENTUKAN TANGGAL UJI COBA MODEL PREDIKSI
-        mask = (df_full.index >= TEST_START) & (df_full.index <= TEST_END)
-        test_dates = df_full.loc[mask].index
-        
-        if len(test_dates) == 0:
-            print("Data kosong pada range tanggal tersebut.")
-            continue
-
-        actual_prices = []
-        predicted_prices = []
-        dates_plot = []
-        
-        print(f"Melakukan simulasi prediksi...")
-        
-        # D. LOOP PREDIKSI HARIAN
-        for date in test_dates:
-            idx = df_full.index.get_loc(date)
-            
-            if idx < LOOKBACK:
-                continue
-            
-            input_window = df_full.iloc[idx-LOOKBACK : idx]
-            features = ['Log_Ret', 'RSI', 'MACD', 'MACD_Signal', 'ATR', 'Volume']
-            input_values = input_window[features].values
-            
-            input_scaled = scaler.transform(input_values)
-            input_reshaped = np.expand_dims(input_scaled, axis=0)
-            
-            pred_log_ret_scaled = model.predict(input_reshaped, verbose=0)[0][0]
-            
-            scale_factor = scaler.scale_[0] 
-            min_factor = scaler.min_[0]    
-            pred_log_ret = (pred_log_ret_scaled - min_factor) / scale_factor
-            
-            last_close_price = input_window['Close'].iloc[-1]
-            pred_price = last_close_price * np.exp(pred_log_ret)
-            
-            actual_price = df_full.loc[date, 'Close']
-            
-            dates_plot.append(date)
-            actual_prices.append(actual_price)
-            predicted_prices.append(pred_price)
-
-        # E. HITUNG ERROR
-        if len(actual_prices) > 0:
+def render_chart(ticker, result, filepath):
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(12, 6))
+    plt.plot(result.index, result['Actual'], label='Actual (Real)', color='green', marker='o')
+    plt.plot(result.index, result['Predicted'], label='Predicted (AI)', color='red', linestyle='--', marker='x')
+    plt.title(f"{ticker} - Validasi Model ({TEST_START} s.d {TEST_END})")
+    plt.xlabel("Tanggal")
+    plt.ylabel("Harga (USD)")
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(filepath)
+    plt.close()
+
+
+def run_ticker(ticker):
+    """Uji satu koin. Kembalikan dict hasil + log teks + histogram telemetry worker"""
+    telemetry.reset()
+    log = io.StringIO()
+    report = {"ticker": ticker, "metrics": None, "chart": None, "series": None, "error": None}
+    start = time.time()
+
+    with redirect_stdout(log):
+        print(f"\nAnalisis Koin: {ticker}")
+        try:
+            # A. LOAD FILE PENTING
+            model_path = os.path.join(MODELS_DIR, f"{ticker}_best_model.keras")
+            if not os.path.exists(model_path):
+                raise FileNotFoundError(f"File tidak ditemukan di {model_path}")
+
+            # TFLite (runtime kecil) jika sudah di-export, selain itu Keras
+            with span("backtest.load_model"):
+                model = model_backend.load_model(ticker)
+                scaler = model_backend.load_scaler(ticker)
+
+            # B. AMBIL DATA LENGKAP
+            with span("backtest.data"):
+                df_full = get_data_with_indicators(ticker, START_BUFFER, DOWNLOAD_END)
+
+            # C. PREDIKSI WALK-FORWARD (semua tanggal uji dalam satu batch, jalur 7 hari per tanggal)
+            print(f"Melakukan simulasi prediksi...")
+            with span("backtest.predict"):
+                dates, predicted, actual = walk_forward_paths(model, scaler, df_full, TEST_START, TEST_END, LOOKBACK)
+
+            if len(dates) == 0:
+                raise ValueError("Data kosong pada range tanggal tersebut.")
+
+            # Grafik & metrik utama tetap memakai horizon hari ke-1
+            result = pd.DataFrame({'Actual': actual[:, 0], 'Predicted': predicted[:, 0]}, index=dates)
+
+            # D. HITUNG ERROR
+            actual_prices, predicted_prices = result['Actual'].values, result['Predicted'].values
             rmse = np.sqrt(mean_squared_error(actual_prices, predicted_prices))
             mae = mean_absolute_error(actual_prices, predicted_prices)
             mape = mean_absolute_percentage_error(actual_prices, predicted_prices)
             accuracy = 100 * (1 - mape)
-            
+
             print(f"HASIL AKHIR (1-21 Jan 2026):")
             print(f"RMSE    : ${rmse:.4f}")
             print(f"MAE     : ${mae:.4f}")
             print(f"MAPE    : {mape:.2%}")
             print(f"AKURASI : {accuracy:.2f}%")
 
-            metrics_dict[ticker] = {
+            # E. ERROR PER HORIZON (hari ke-1 .. ke-7; target setelah DOWNLOAD_END tidak dihitung)
+            horizons = horizon_metrics(predicted, actual)
+            print("ERROR PER HORIZON:")
+            for h in horizons:
+                print(f"  Hari {h['day']}: RMSE ${h['RMSE']:.4f} | MAE ${h['MAE']:.4f} | MAPE {h['MAPE']:.2f}% (n={h['n']})")
+
+            report["metrics"] = {
                 "RMSE": round(float(rmse), 8),
-                "MAPE": round(float(mape * 100), 2)
+                "MAPE": round(float(mape * 100), 2),
+                "horizons": horizons,
+            }
+            report["mae"] = float(mae)
+            report["series"] = {
+                "dates": [d.strftime("%Y-%m-%d") for d in result.index],
+                "actual": [float(v) for v in actual_prices],
+                "predicted": [float(v) for v in predicted_prices],
             }
 
-            plt.figure(figsize=(12, 6))
-            plt.plot(dates_plot, actual_prices, label='Actual (Real)', color='green', marker='o')
-            plt.plot(dates_plot, predicted_prices, label='Predicted (AI)', color='red', linestyle='--', marker='x')
-            plt.title(f"{ticker} - Validasi Model ({TEST_START} s.d {TEST_END})")
-            plt.xlabel("Tanggal")
-            plt.ylabel("Harga (USD)")
-            plt.legend()
-            plt.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            # plt.show()
-
+            # F. GRAFIK
             filename = f"{ticker}_ujicobamodel.png"
             filepath = os.path.join(OUTPUT_DIR, filename)
-            plt.savefig(filepath)
+            with span("backtest.render"):
+                render_chart(ticker, result, filepath)
+            report["chart"] = filename
             print(f"Gambar grafik disimpan di: {filepath}")
-            plt.close()
-            
-        else:
-            print("Tidak ada data prediksi yang dihasilkan.")
-        
+
+        except Exception as e:
+            print(f"CRITICAL ERROR pada {ticker}: {e}")
+            traceback.print_exc(file=log)
+            report["error"] = str(e)
+
         print("-" * 70)
 
-    except Exception as e:
-        print(f"CRITICAL ERROR pada {ticker}: {e}")
-        import traceback
-        traceback.print_exc()
+    report["seconds"] = round(time.time() - start, 3)
+    return report, log.getvalue(), telemetry.dump_state()
+
+
+# 3. LAPORAN GABUNGAN
+def save_metrics(reports):
+    """Gabungkan ke metrics.json yang sudah ada (koin yang tidak diuji ulang tetap tersimpan)"""
+    try:
+        with open(METRICS_PATH, 'r') as f:
+            metrics_dict = json.load(f)
+    except (OSError, ValueError):
+        metrics_dict = {}
+    for report in reports:
+        if report["metrics"] is not None:
+            metrics_dict[report["ticker"]] = report["metrics"]
+    with open(METRICS_PATH, 'w') as f:
+        json.dump(metrics_dict, f, indent=4)
+    return METRICS_PATH
+
+
+def report_html(reports, wall_seconds):
+    rows, horizon_rows, charts = [], [], []
+    for r in reports:
+        if r["metrics"] is not None:
+            mape_by_day = {h["day"]: h["MAPE"] for h in r["metrics"].get("horizons", [])}
+            horizon_rows.append(f"<tr><td>{r['ticker']}</td>" + "".join(
+                f"<td>{mape_by_day[day]}%</td>" if day in mape_by_day else "<td>-</td>"
+                for day in range(1, HORIZON + 1)) + "</tr>")
+            rows.append(f"<tr><td>{r['ticker']}</td><td>{r['metrics']['RMSE']:,}</td><td>{r['mae']:,.6f}</td>"
+                        f"<td>{r['metrics']['MAPE']}%</td><td>{r['seconds']:.1f}s</td><td></td></tr>")
+            charts.append(f"<h3>{r['ticker']}</h3><img src='{r['chart']}' style='max-width:100%'>")
+        else:
+            rows.append(f"<tr><td>{r['ticker']}</td><td>-</td><td>-</td><td>-</td>"
+                        f"<td>{r['seconds']:.1f}s</td><td>{r['error']}</td></tr>")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Validasi Model {TEST_START} s.d {TEST_END}</title>
+<style>body {{ font-family: sans-serif; margin: 30px; }} table {{ border-collapse: collapse; }}
+td, th {{ border: 1px solid #ccc; padding: 6px 12px; text-align: right; }} td:first-child {{ text-align: left; }}</style>
+</head><body>
+<h1>Validasi Model ({TEST_START} s.d {TEST_END})</h1>
+<p>{len(reports)} koin, waktu total {wall_seconds:.1f} detik.</p>
+<table><tr><th>Ticker</th><th>RMSE</th><th>MAE</th><th>MAPE</th><th>Durasi</th><th>Error</th></tr>
+{''.join(rows)}
+</table>
+<h2>MAPE per horizon</h2>
+<table><tr><th>Ticker</th>{''.join(f'<th>Hari {day}</th>' for day in range(1, HORIZON + 1))}</tr>
+{''.join(horizon_rows)}
+</table>
+{''.join(charts)}
+</body></html>
+"""
+
+
+def save_report(reports, wall_seconds):
+    json_path = os.path.join(OUTPUT_DIR, "report_ujicobamodel.json")
+    with open(json_path, 'w') as f:
+        json.dump({
+            "test_start": TEST_START,
+            "test_end": TEST_END,
+            "wall_seconds": round(wall_seconds, 3),
+            "tickers": reports,
+            "telemetry": telemetry.snapshot(),
+        }, f, indent=2)
+    html_path = os.path.join(OUTPUT_DIR, "report_ujicobamodel.html")
+    with open(html_path, 'w') as f:
+        f.write(report_html(reports, wall_seconds))
+    return json_path, html_path
+
+
+# EKSEKUSI PENGUJIAN UTAMA
+def main(tickers, workers):
+    print(f"Working Directory Script: {BASE_DIR}")
+    print(f"Folder Models terdeteksi di: {MODELS_DIR}")
+    print(f"Folder Scalers terdeteksi di: {SCALERS_DIR}")
+    print(f"Gambar akan disimpan di: {OUTPUT_DIR}")
+
+    print("\n" + "="*70)
+    print(f"MEMULAI PENGUJIAN VALIDASI MODEL (1-21 Jan 2026), {len(tickers)} koin, {workers} worker")
+    print("="*70)
+
+    start = time.time()
+    reports = {}
+    # Satu task per koin; log tiap koin dicetak utuh saat task-nya selesai
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = {executor.submit(run_ticker, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                report, log, state = future.result()
+            except Exception as e:
+                # worker mati (mis. kehabisan memori) -> koin lain tetap jalan
+                report, log, state = {"ticker": ticker, "metrics": None, "chart": None, "series": None,
+                                      "error": str(e), "seconds": 0.0}, f"CRITICAL ERROR pada {ticker}: {e}\n", {}
+            print(log, end="")
+            telemetry.merge_state(state)
+            reports[ticker] = report
+    wall_seconds = time.time() - start
+
+    ordered = [reports[ticker] for ticker in tickers]
+    metrics_path = save_metrics(ordered)
+    print(f"\n✅ File metrik berhasil disimpan di: {metrics_path}")
+    json_path, html_path = save_report(ordered, wall_seconds)
+    print(f"Laporan gabungan: {html_path} / {json_path}")
+
+    # Ringkasan latency per tahap (gabungan semua worker)
+    telemetry_path = os.path.join(OUTPUT_DIR, "telemetry_ujicobamodel.jsonl")
+    telemetry.export_jsonl(telemetry_path, append=False)
+    print("\nLATENCY PER TAHAP (ms):")
+    for stage, stats in telemetry.snapshot().items():
+        print(f"{stage:<22} n={stats['count']:<3} p50={stats['p50_ms']:>9.2f} p95={stats['p95_ms']:>9.2f} p99={stats['p99_ms']:>9.2f}")
+    print(f"Telemetry disimpan di: {telemetry_path}")
+
+    print(f"\nPENGUJIAN SELESAI dalam {wall_seconds:.1f} detik.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validasi model LSTM (backtest) untuk banyak koin secara paralel")
+    parser.add_argument("tickers", nargs="*", default=COINS, help="Ticker yang diuji (default: semua koin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Jumlah proses worker (default: jumlah core CPU)")
+    args = parser.parse_args()
 
-metrics_path = os.path.join(BASE_DIR, 'metrics.json')
-with open(metrics_path, 'w') as f:
-    json.dump(metrics_dict, f, indent=4)
-print(f"\n✅ File metrik berhasil disimpan di: {metrics_path}")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    # Aktifkan Pencatatan Otomatis
+    sys.stdout = DualLogger(os.path.join(OUTPUT_DIR, "log_ujicobamodel.txt"))
 
-print("\nPENGUJIAN SELESAI.")
\ No newline at end of file
+    main(args.tickers, max(1, min(args.workers, len(args.tickers))))
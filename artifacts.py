@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from datetime import datetime
+import numpy as np
+from features import FEATURES, LOOKBACK
+from forecasting import HORIZON
+
+# Bundle artefak per ticker (models/<ticker>_bundle.json) yang berversi:
+# - referensi file model (.keras, .tflite), parameter scaler (.npz, array float mentah) dan scaler sumbernya
+#   (.pkl, agar bundle ditolak kalau pickle diganti tanpa build ulang) + hash SHA-256
+# - urutan fitur, LOOKBACK dan HORIZON yang dipakai saat training
+# - fingerprint gabungan dari semua hash -> key forecast cache / hasil batch
+# Scaler dimuat dengan np.load(allow_pickle=False): tanpa sklearn dan tanpa menjalankan pickle.
+#
+# Bangun ulang bundle setelah model/scaler diganti:
+#   python artifacts.py                # semua koin yang punya model
+#   python artifacts.py BTC-USD
+
+BUNDLE_VERSION = 2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+SCALERS_DIR = os.path.join(BASE_DIR, 'scalers')
+
+_hash_memo = {}
+
+
+def model_paths(ticker):
+    return (os.path.join(MODELS_DIR, f"{ticker}_best_model.keras"),
+            os.path.join(SCALERS_DIR, f"{ticker}_scaler.pkl"))
+
+
+def file_hash(path):
+    """SHA-256 isi file, di-memo per (path, mtime, size) agar tidak hashing ulang setiap request"""
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _hash_memo:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _hash_memo[memo_key] = digest.hexdigest()
+    return _hash_memo[memo_key]
+
+
+def bundle_path(ticker):
+    return os.path.join(MODELS_DIR, f"{ticker}_bundle.json")
+
+
+def scaler_array_path(ticker):
+    return os.path.join(SCALERS_DIR, f"{ticker}_scaler.npz")
+
+
+class ArrayScaler:
+    """Pengganti MinMaxScaler untuk inferensi: transform/inverse sebagai operasi array NumPy"""
+
+    def __init__(self, min_, scale_, data_min_, data_max_, feature_range=(0.0, 1.0)):
+        self.min_ = np.asarray(min_, dtype='float64')
+        self.scale_ = np.asarray(scale_, dtype='float64')
+        self.data_min_ = np.asarray(data_min_, dtype='float64')
+        self.data_max_ = np.asarray(data_max_, dtype='float64')
+        self.feature_range = tuple(float(v) for v in feature_range)
+
+    @property
+    def n_features_in_(self):
+        return len(self.scale_)
+
+    def transform(self, X):
+        # sama dengan MinMaxScaler.transform (clip=False): X * scale_ + min_
+        return np.asarray(X, dtype='float64') * self.scale_ + self.min_
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype='float64') - self.min_) / self.scale_
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(scaler.min_, scaler.scale_, scaler.data_min_, scaler.data_max_, scaler.feature_range)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp_path, min_=self.min_, scale_=self.scale_, data_min_=self.data_min_,
+                 data_max_=self.data_max_, feature_range=np.asarray(self.feature_range))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['min_'], data['scale_'], data['data_min_'], data['data_max_'], data['feature_range'])
+
+
+def _file_record(path):
+    return {"path": os.path.relpath(path, BASE_DIR), "sha256": file_hash(path), "size": os.path.getsize(path)}
+
+
+def _fingerprint(files):
+    raw = "|".join(f"{name}:{record['sha256']}" for name, record in sorted(files.items()))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def build_bundle(ticker):
+    """Konversi scaler pickle -> .npz lalu tulis manifest bundle (sekali, setelah training/export)"""
+    import joblib
+    keras_path, pickle_path = model_paths(ticker)
+    ArrayScaler.from_sklearn(joblib.load(pickle_path)).save(scaler_array_path(ticker))
+
+    files = {"keras": _file_record(keras_path), "scaler": _file_record(scaler_array_path(ticker)),
+             "scaler_source": _file_record(pickle_path)}
+    lite_path = os.path.join(MODELS_DIR, f"{ticker}_best_model.tflite")
+    if os.path.exists(lite_path):
+        files["tflite"] = _file_record(lite_path)
+
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "ticker": ticker,
+        "features": FEATURES,
+        "lookback": LOOKBACK,
+        "horizon": HORIZON,
+        "files": files,
+        "fingerprint": _fingerprint(files),
+        "created": datetime.now().isoformat(timespec='seconds'),
+    }
+    path = bundle_path(ticker)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(bundle, f, indent=2)
+    os.replace(tmp_path, path)
+    return bundle
+
+
+def load_bundle(ticker):
+    """Manifest bundle, atau None jika tidak ada / versi lain / isi file berbeda dari hash yang tercatat"""
+    try:
+        with open(bundle_path(ticker), 'r') as f:
+            bundle = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if bundle.get("version") != BUNDLE_VERSION:
+        return None
+
+    # hash di-memo per (path, mtime, size), jadi verifikasi hanya mahal sekali per perubahan file
+    for record in bundle["files"].values():
+        path = os.path.join(BASE_DIR, record["path"])
+        try:
+            if os.path.getsize(path) != record["size"] or file_hash(path) != record["sha256"]:
+                return None
+        except OSError:
+            return None
+    lite_path = os.path.join(MODELS_DIR, f"{ticker}_best_model.tflite")
+    if "tflite" not in bundle["files"] and os.path.exists(lite_path):
+        # artefak TFLite baru di-export setelah bundle dibuat
+        return None
+    return bundle
+
+
+def load_array_scaler(ticker, bundle=None):
+    """Scaler dari bundle; ValueError jika fitur/lookback bundle tidak cocok dengan kode saat ini"""
+    bundle = bundle or load_bundle(ticker)
+    if bundle is None:
+        return None
+    if bundle["features"] != FEATURES or bundle["lookback"] != LOOKBACK:
+        raise ValueError(f"Bundle {ticker} dibuat untuk fitur {bundle['features']} / lookback {bundle['lookback']}")
+    return ArrayScaler.load(os.path.join(BASE_DIR, bundle["files"]["scaler"]["path"]))
+
+
+if __name__ == "__main__":
+    tickers = sys.argv[1:] or sorted(
+        name[:-len("_best_model.keras")] for name in os.listdir(MODELS_DIR) if name.endswith("_best_model.keras"))
+    for ticker in tickers:
+        bundle = build_bundle(ticker)
+        print(f"{ticker}: {bundle_path(ticker)} (fingerprint {bundle['fingerprint'][:16]})")
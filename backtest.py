@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from features import FEATURES, LOOKBACK
+from forecasting import HORIZON
+
+# Engine walk-forward backtest: semua window dibangun sekaligus (strided view),
+# di-scale sekali jalan, lalu diprediksi dengan satu panggilan model.predict per koin.
+# Ketujuh horizon dievaluasi dari matriks (tanggal x horizon), tanpa loop Python.
+
+
+def build_windows(values, end_positions, lookback=LOOKBACK):
+    """Window (lookback x fitur) yang berakhir tepat sebelum setiap posisi, sebagai view strided"""
+    # sliding_window_view -> (n - lookback + 1, fitur, lookback); window ke-i = baris i .. i+lookback-1
+    windows = sliding_window_view(values, lookback, axis=0).transpose(0, 2, 1)
+    return windows[np.asarray(end_positions) - lookback]
+
+
+def walk_forward_paths(model, scaler, df_full, test_start, test_end, lookback=LOOKBACK, features=FEATURES):
+    """Jalur harga HORIZON hari dari setiap tanggal uji, dalam satu batch.
+    Kembalikan (index tanggal uji, prediksi (n x HORIZON), aktual (n x HORIZON), NaN jika belum ada datanya)."""
+    mask = (df_full.index >= test_start) & (df_full.index <= test_end)
+    positions = np.flatnonzero(mask)
+    # tanggal yang belum punya cukup data lookback dilewati (sama seperti loop harian)
+    positions = positions[positions >= lookback]
+
+    if len(positions) == 0:
+        empty = np.empty((0, HORIZON))
+        return pd.DatetimeIndex([], name='Date'), empty, empty
+
+    # MinMaxScaler bekerja per kolom, jadi scale seluruh baris sekali = scale per window
+    scaled = scaler.transform(df_full[features].values)
+    X = build_windows(scaled, positions, lookback)
+
+    pred_log_ret_scaled = np.asarray(model.predict(X, verbose=0))
+    pred_log_ret = (pred_log_ret_scaled - scaler.min_[0]) / scaler.scale_[0]
+
+    # harga hari ke-h = close terakhir x exp(jumlah log-return hari 1..h)
+    close = df_full['Close'].values
+    last_close = close[positions - 1]
+    predicted = last_close[:, np.newaxis] * np.exp(np.cumsum(pred_log_ret, axis=1))
+
+    # target hari ke-h dari tanggal uji di posisi p adalah close di posisi p - 1 + h
+    targets = positions[:, np.newaxis] - 1 + np.arange(1, pred_log_ret.shape[1] + 1)
+    actual = np.full(targets.shape, np.nan)
+    available = targets < len(close)
+    actual[available] = close[targets[available]]
+
+    return df_full.index[positions], predicted, actual
+
+
+def walk_forward_predict(model, scaler, df_full, test_start, test_end, lookback=LOOKBACK, features=FEATURES):
+    """Prediksi harga 1 hari ke depan untuk setiap tanggal uji dalam satu batch"""
+    dates, predicted, actual = walk_forward_paths(model, scaler, df_full, test_start, test_end, lookback, features)
+    return pd.DataFrame({
+        'Actual': actual[:, 0],
+        'Predicted': predicted[:, 0],
+    }, index=dates)
+
+
+def horizon_metrics(predicted, actual):
+    """RMSE/MAE/MAPE (%) per horizon dari matriks (tanggal x horizon); sel tanpa data aktual diabaikan"""
+    valid = ~np.isnan(actual)
+    error = np.where(valid, predicted - actual, np.nan)
+    pct_error = np.abs(error) / np.where(valid, np.abs(actual), np.nan)
+    counts = valid.sum(axis=0)
+
+    # horizon tanpa data aktual (n = 0) tidak dilaporkan; pembagi 1 hanya agar tidak ada mean dari slice kosong
+    n = np.maximum(counts, 1)
+    rmse = np.sqrt(np.nansum(error ** 2, axis=0) / n)
+    mae = np.nansum(np.abs(error), axis=0) / n
+    mape = np.nansum(pct_error, axis=0) / n * 100
+
+    return [
+        {"day": day + 1, "RMSE": round(float(rmse[day]), 8), "MAE": round(float(mae[day]), 8),
+         "MAPE": round(float(mape[day]), 2), "n": int(counts[day])}
+        for day in range(predicted.shape[1]) if counts[day] > 0
+    ]
@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import warnings
+from datetime import datetime
+import numpy as np
+from synthetic_data import generate_universe
+from features import compute_features, IndicatorState, FEATURES, LOOKBACK
+
+# Benchmark offline (tanpa jaringan) untuk jalur-jalur yang sensitif performa.
+# Data OHLCV dibuat sintetis, hasil disimpan ke JSON agar bisa dibandingkan antar commit.
+#
+# Contoh:
+#   python benchmark.py --tickers 5 --years 4
+#   python benchmark.py --compare hasil_benchmark/benchmark_<commit_lama>.json
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.join(BASE_DIR, 'hasil_benchmark')
+
+
+def measure(fn, repeat, warmup=1):
+    """Jalankan fn berulang kali, kembalikan statistik durasi (ms)"""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations = np.array(durations)
+    return {
+        "repeat": repeat,
+        "mean_ms": float(durations.mean()),
+        "p50_ms": float(np.percentile(durations, 50)),
+        "min_ms": float(durations.min()),
+        "max_ms": float(durations.max()),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def _load_scaler(ticker, frame):
+    """Scaler asli dari folder scalers/, atau MinMaxScaler baru dari data sintetis"""
+    try:
+        from model_backend import load_scaler
+        return load_scaler(ticker)
+    except Exception:
+        from sklearn.preprocessing import MinMaxScaler
+        return MinMaxScaler().fit(frame[FEATURES].values)
+
+
+def bench_features(universe, repeat):
+    results = {}
+    frames = list(universe.values())
+    results[f"features.compute_features ({len(frames)} ticker)"] = measure(
+        lambda: [compute_features(df) for df in frames], repeat)
+
+    # biaya append 1 candle dengan state inkremental (sudah warm)
+    df = frames[0]
+    state = IndicatorState()
+    state.update_frame(df.iloc[:-1])
+    last_ts, last = df.index[-1], df.iloc[-1]
+    results["features.IndicatorState.update (1 candle)"] = measure(
+        lambda: state.copy().update(last_ts, last['High'], last['Low'], last['Close']), repeat * 20)
+    return results
+
+
+def bench_scaling(frame, scaler, repeat):
+    window = frame[FEATURES].values[-LOOKBACK:]
+    values = frame[FEATURES].values
+    return {
+        "scaler.transform (1 window)": measure(lambda: scaler.transform(window), repeat * 20),
+        f"scaler.transform (full frame, {len(values)} baris)": measure(lambda: scaler.transform(values), repeat),
+    }
+
+
+def bench_models(ticker, frame, scaler, repeat, batch_size):
+    from model_backend import load_model, tflite_path
+    from backtest import walk_forward_predict
+
+    results = {}
+    backends = {"keras": lambda: load_model(ticker, prefer_lite=False)}
+    if os.path.exists(tflite_path(ticker)):
+        backends["tflite"] = lambda: load_model(ticker, prefer_lite=True)
+
+    rng = np.random.default_rng(0)
+    single = rng.random((1, LOOKBACK, len(FEATURES)), dtype=np.float32)
+    batch = rng.random((batch_size, LOOKBACK, len(FEATURES)), dtype=np.float32)
+    # history pendek (mis. --years 1 setelah baris warm-up indikator dibuang) -> backtest seluruh frame
+    test_days = min(365, len(frame))
+    test_start, test_end = frame.index[-test_days], frame.index[-1]
+
+    for name, loader in backends.items():
+        try:
+            start = time.perf_counter()
+            model = loader()
+            results[f"{name}: load_model"] = {"repeat": 1, "mean_ms": (time.perf_counter() - start) * 1000}
+        except Exception as e:
+            print(f"Backend {name} dilewati: {e}")
+            continue
+
+        results[f"{name}: model.predict (1 window)"] = measure(lambda: model.predict(single, verbose=0), repeat)
+        results[f"{name}: model.predict ({batch_size} window)"] = measure(lambda: model.predict(batch, verbose=0), repeat)
+        results[f"{name}: backtest walk_forward_predict ({test_days} hari)"] = measure(
+            lambda: walk_forward_predict(model, scaler, frame, test_start, test_end), repeat)
+    return results
+
+
+def bench_home_table(n_rows, repeat):
+    from utils import build_market_table_html
+
+    rng = np.random.default_rng(0)
+    data = [{
+        "Ticker": f"SYN{i:03d}-USD", "Name": f"Synthetic {i}", "Icon": "",
+        "Price": float(rng.uniform(1e-6, 1e5)), "Change": float(rng.normal(0, 5)),
+        "ATL": float(rng.uniform(1e-7, 1)), "MarketCap": float(rng.uniform(1e6, 1e12)),
+        "Volume": float(rng.uniform(1e5, 1e10)), "Stale": False,
+    } for i in range(n_rows)]
+    return {f"Home: build_market_table_html ({n_rows} baris)": measure(lambda: build_market_table_html(data), repeat)}
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    print(f"\nPerbandingan terhadap {baseline.get('commit')} ({baseline_path}):")
+    for name, stats in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old is None:
+            continue
+        ratio = stats["mean_ms"] / old["mean_ms"] if old["mean_ms"] else float('nan')
+        print(f"  {name:<60} {old['mean_ms']:>10.3f} -> {stats['mean_ms']:>10.3f} ms  (x{ratio:.2f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline dengan data OHLCV sintetis")
+    parser.add_argument("--tickers", type=int, default=5, help="Jumlah ticker sintetis")
+    parser.add_argument("--years", type=float, default=4, help="Panjang history per ticker (tahun)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--table-rows", type=int, default=500)
+    parser.add_argument("--model-ticker", default="BTC-USD", help="Model di folder models/ yang dipakai")
+    parser.add_argument("--skip-model", action="store_true", help="Lewati benchmark model/backtest")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="File JSON hasil benchmark sebelumnya")
+    args = parser.parse_args()
+
+    universe = generate_universe(args.tickers, years=args.years)
+    frame = compute_features(next(iter(universe.values())))
+    scaler = _load_scaler(args.model_ticker, frame)
+
+    results = {}
+    results.update(bench_features(universe, args.repeat))
+    results.update(bench_scaling(frame, scaler, args.repeat))
+    if not args.skip_model:
+        results.update(bench_models(args.model_ticker, frame, scaler, args.repeat, args.batch_size))
+    results.update(bench_home_table(args.table_rows, args.repeat))
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "params": vars(args),
+        "results": results,
+    }
+
+    output = args.output or os.path.join(OUTPUT_DIR, f"benchmark_{commit}_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    for name, stats in results.items():
+        print(f"{name:<62} {stats['mean_ms']:>10.3f} ms")
+    print(f"\n✅ Hasil benchmark disimpan di: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from candle_store import OHLCV_COLS, store_dir
+from features import INDICATOR_COLS, get_features
+from telemetry import span
+
+# Candle + indikator dalam array NumPy ber-dtype tetap yang di-memory-map dari disk
+# (satu file per ticker & interval). Memotong rentang waktu = view tanpa copy, dan semua
+# sesi/proses yang membaca file yang sama berbagi page cache OS yang sama, bukan
+# masing-masing memegang salinan DataFrame. Cocok untuk history intraday (1h/15m) bertahun-tahun.
+
+COLUMNS = OHLCV_COLS + INDICATOR_COLS
+DTYPE = np.dtype([('ts', '<i8')] + [(col, '<f8') for col in COLUMNS])
+
+# Jeda minimum antar sinkronisasi (refresh store + indikator + file array) per ticker & interval
+SYNC_INTERVAL_SECONDS = 60
+
+_maps = {}
+_last_sync = {}
+_lock = threading.Lock()
+
+
+def array_path(ticker, interval="1d"):
+    return os.path.join(store_dir(), f"{ticker}_{interval}.candles.bin")
+
+
+def frame_to_records(df):
+    """DataFrame (OHLCV + indikator) -> structured array DTYPE"""
+    records = np.empty(len(df), dtype=DTYPE)
+    records['ts'] = df.index.values.astype('datetime64[ns]').astype('<i8')
+    for col in COLUMNS:
+        records[col] = df[col].values
+    return records
+
+
+def records_to_frame(records):
+    """Structured array (biasanya hasil slice kecil) -> DataFrame untuk Plotly/pandas"""
+    index = pd.DatetimeIndex(records['ts'].astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame({col: records[col] for col in COLUMNS}, index=index)
+
+
+def _rewrite(path, records):
+    """Tulis ulang seluruh file (atomik): pembaca lama tetap memegang file/inode lama"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    records.tofile(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def sync_array(ticker, interval, feats):
+    """Samakan file array dengan frame fitur: hanya baris terakhir (candle berjalan) & baris baru ditulis"""
+    path = array_path(ticker, interval)
+    records = frame_to_records(feats)
+    if len(records) == 0:
+        return
+
+    existing = open_array(ticker, interval)
+    if existing is None or len(existing) == 0 or existing['ts'][0] != records['ts'][0]:
+        _rewrite(path, records)
+        return
+
+    # Baris terakhir di file bisa candle yang belum close -> ditimpa mulai dari posisi itu
+    position = len(existing) - 1
+    new_position = int(np.searchsorted(records['ts'], existing['ts'][-1]))
+    if new_position != position or new_position >= len(records):
+        # history berubah (store dibangun ulang) -> tulis ulang
+        _rewrite(path, records)
+        return
+
+    with open(path, 'r+b') as f:
+        f.seek(position * DTYPE.itemsize)
+        f.write(records[position:].tobytes())
+
+
+def open_array(ticker, interval="1d"):
+    """Memmap read-only dari file array (None jika belum ada). Dipakai bersama dalam satu proses."""
+    path = array_path(ticker, interval)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    rows = stat.st_size // DTYPE.itemsize
+    if rows == 0:
+        return None
+    key = (stat.st_ino, rows, stat.st_mtime_ns)
+    with _lock:
+        cached = _maps.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        array = np.memmap(path, dtype=DTYPE, mode='r', shape=(rows,))
+        _maps[path] = (key, array)
+        return array
+
+
+def load_array(ticker, interval="1d", refresh=True):
+    """Array candle+indikator terbaru; refresh store & file array paling sering tiap SYNC_INTERVAL_SECONDS"""
+    key = (store_dir(), ticker, interval)
+    if refresh and time.time() - _last_sync.get(key, 0) >= SYNC_INTERVAL_SECONDS:
+        with span("array.sync"):
+            feats = get_features(ticker, interval=interval)
+            if not feats.empty:
+                sync_array(ticker, interval, feats)
+        _last_sync[key] = time.time()
+    return open_array(ticker, interval)
+
+
+def slice_range(array, start=None, end=None):
+    """Potong array ke [start, end] tanpa copy (binary search pada kolom ts)"""
+    ts = array['ts']
+    lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side='left'))
+    hi = len(array) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='right'))
+    return array[lo:hi]
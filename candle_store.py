@@ -0,0 +1,213 @@
+import os
+import time
+import threading
+import pandas as pd
+from data_provider import get_provider, period_to_start
+from request_scheduler import run_bounded
+from telemetry import span
+
+# Penyimpanan candle OHLCV lokal (satu file Parquet per ticker & interval).
+# Refresh hanya menarik candle setelah timestamp terakhir yang tersimpan,
+# sehingga tidak perlu lagi download history(period="max") setiap cache habis.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, 'data', 'candles')
+
+OHLCV_COLS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Jeda minimum (detik) sebelum store yang sama boleh di-refresh lagi ke Yahoo
+MIN_REFRESH_SECONDS = 60
+
+# Batas history intraday dari Yahoo Finance (request di luar batas ini ditolak)
+INTRADAY_MAX_PERIOD = {
+    "1m": "7d",
+    "2m": "60d",
+    "5m": "60d",
+    "15m": "60d",
+    "30m": "60d",
+    "90m": "60d",
+    "60m": "730d",
+    "1h": "730d",
+}
+
+
+def store_dir():
+    """Folder store untuk provider aktif (data replay/sintetis tidak tercampur dengan data Yahoo)"""
+    provider = get_provider()
+    if provider.name == "yfinance":
+        return STORE_DIR
+    return os.path.join(STORE_DIR, provider.name)
+
+
+def store_path(ticker, interval="1d"):
+    """Lokasi file Parquet untuk ticker & interval tertentu"""
+    return os.path.join(store_dir(), f"{ticker}_{interval}.parquet")
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=OHLCV_COLS, index=pd.DatetimeIndex([], name='Date'), dtype='float64')
+
+
+def _normalize(df):
+    """Samakan format hasil yfinance: kolom OHLCV saja, index tanpa timezone & urut"""
+    if df is None or df.empty:
+        return _empty_frame()
+
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    if not all(col in df.columns for col in OHLCV_COLS):
+        return _empty_frame()
+
+    df = df[OHLCV_COLS].astype('float64')
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df.index.name = 'Date'
+
+    df = df.dropna(subset=['Close'])
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+    return df
+
+
+def _fetch(ticker, interval, start=None):
+    """Download dari provider data. Tanpa start = seluruh history (hanya saat store masih kosong)"""
+    provider = get_provider()
+    max_period = INTRADAY_MAX_PERIOD.get(interval)
+    if start is not None and max_period is not None:
+        # store intraday yang lama tidak di-refresh: mulai dari batas terjauh yang masih diizinkan
+        earliest = period_to_start(max_period) + pd.Timedelta(hours=1)
+        start = max(pd.Timestamp(start), earliest).to_pydatetime()
+    with span("fetch.provider"):
+        if start is None:
+            df = provider.history(ticker, period=max_period or "max", interval=interval)
+        else:
+            df = provider.history(ticker, start=start, interval=interval)
+    return _normalize(df)
+
+
+def write_frame(df, path):
+    """Tulis atomik (file sementara lalu rename) agar pembaca lain tidak melihat file setengah jadi"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def store_age(ticker, interval="1d"):
+    """Berapa detik sejak store terakhir di-refresh (None jika store belum ada)"""
+    path = store_path(ticker, interval)
+    if not os.path.exists(path):
+        return None
+    return time.time() - os.path.getmtime(path)
+
+
+def load_candles(ticker, interval="1d"):
+    """Membaca candle yang sudah tersimpan di disk (tanpa akses jaringan)"""
+    path = store_path(ticker, interval)
+    if not os.path.exists(path):
+        return _empty_frame()
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:
+        print(f"Store {ticker} rusak, akan dibangun ulang: {e}")
+        return _empty_frame()
+
+
+def _merge(path, stored, new):
+    """Gabungkan candle baru ke store (candle lama yang tumpang tindih ditimpa) lalu tulis"""
+    if new.empty:
+        if not stored.empty:
+            # tandai sudah dicek agar tidak langsung fetch ulang
+            os.utime(path, None)
+        return stored
+
+    combined = pd.concat([stored[stored.index < new.index[0]], new])
+    combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+    write_frame(combined, path)
+    return combined
+
+
+def _is_fresh(path, stored):
+    return not stored.empty and time.time() - os.path.getmtime(path) < MIN_REFRESH_SECONDS
+
+
+def update_candles(ticker, interval="1d", force=False):
+    """Menarik hanya candle setelah timestamp terakhir lalu append ke store"""
+    path = store_path(ticker, interval)
+    stored = load_candles(ticker, interval)
+
+    if not force and _is_fresh(path, stored):
+        return stored
+
+    if stored.empty:
+        new = _fetch(ticker, interval)
+    else:
+        # Mulai dari candle terakhir (inklusif): candle berjalan yang belum close ikut diperbarui
+        new = _fetch(ticker, interval, start=stored.index[-1].to_pydatetime())
+
+    return _merge(path, stored, new)
+
+
+# Ticker yang sedang di-refresh di background oleh update_candles_many (tidak di-submit ulang)
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _refresh_order(tickers, interval, stored):
+    """Store kosong dulu, lalu yang paling lama tidak di-refresh: ticker yang tertinggal kebagian duluan"""
+    def key(ticker):
+        if stored[ticker].empty:
+            return float('-inf')
+        try:
+            return os.path.getmtime(store_path(ticker, interval))
+        except OSError:
+            return float('-inf')
+    return sorted(tickers, key=key)
+
+
+def update_candles_many(tickers, interval="1d", force=False):
+    """Versi banyak ticker dari update_candles: tiap ticker di-refresh sendiri (mulai dari candle terakhirnya
+    sendiri) di pool terbatas, jadi satu store yang tertinggal tidak membuat ticker lain download ulang
+    history panjang, dan satu ticker lambat tidak menahan yang lain.
+    Dengan rate limit, satu panggilan hanya sempat me-refresh sebagian universe dalam TICKER_TIMEOUT;
+    sisanya tetap berjalan di background (urut dari store tertua) dan terbaca di panggilan berikutnya.
+    Kembalikan (dict ticker -> candle, set ticker yang gagal di-refresh dan memakai data lokal)."""
+    stored = {ticker: load_candles(ticker, interval) for ticker in tickers}
+    due = [t for t in tickers if force or not _is_fresh(store_path(t, interval), stored[t])]
+    with _refreshing_lock:
+        due = [t for t in _refresh_order(due, interval, stored) if t not in _refreshing]
+        _refreshing.update(due)
+    result, failed = dict(stored), set()
+
+    def refresh(ticker):
+        try:
+            return update_candles(ticker, interval, force=True)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(ticker)
+
+    with span("fetch.provider_batch"):
+        updated, errors, _ = run_bounded(refresh, due, cancel_pending=False)
+    result.update(updated)
+    for ticker, e in errors.items():
+        print(f"Gagal refresh {ticker}, pakai data lokal: {e}")
+        failed.add(ticker)
+    return result, failed
+
+
+def get_candles(ticker, start=None, end=None, interval="1d", refresh=True):
+    """Ambil candle dari store (refresh inkremental dulu), dipotong ke [start, end)"""
+    if refresh:
+        try:
+            df = update_candles(ticker, interval)
+        except Exception as e:
+            print(f"Gagal refresh store {ticker}, pakai data lokal: {e}")
+            df = load_candles(ticker, interval)
+    else:
+        df = load_candles(ticker, interval)
+
+    if start is not None:
+        df = df.loc[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df.loc[df.index < pd.Timestamp(end)]
+    return df.copy()
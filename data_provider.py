@@ -0,0 +1,204 @@
+import os
+import re
+import time
+import threading
+import pandas as pd
+from request_scheduler import get_scheduler, run_bounded
+
+# Lapisan penyedia data: semua akses data pasar (history candle & info ticker) lewat sini.
+# - YFinanceProvider : Yahoo Finance (default)
+# - ReplayProvider   : candle rekaman/sintetis dari file lokal dengan latency yang bisa diatur,
+#                      untuk load-test dashboard & backtest di lingkungan tanpa internet
+#
+# Pilih lewat environment variable:
+#   DATA_PROVIDER=replay REPLAY_DIR=data/replay REPLAY_LATENCY=0.2 streamlit run Home.py
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REPLAY_DIR = os.path.join(BASE_DIR, 'data', 'replay')
+
+
+def period_to_start(period, now=None):
+    """Terjemahkan period gaya yfinance ('max', '1y', '6mo', '5d', ...) menjadi tanggal awal"""
+    if period is None or period == "max":
+        return None
+    now = now or pd.Timestamp.now()
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Period tidak dikenal: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        return now - pd.DateOffset(days=n)
+    if unit == "wk":
+        return now - pd.DateOffset(weeks=n)
+    if unit == "mo":
+        return now - pd.DateOffset(months=n)
+    return now - pd.DateOffset(years=n)
+
+
+def interval_to_freq(interval):
+    """Interval yfinance ('1d', '1h', '15m', '1wk') -> frekuensi pandas"""
+    match = re.fullmatch(r"(\d+)(m|h|d|wk|mo)", interval)
+    if not match:
+        raise ValueError(f"Interval tidak dikenal: {interval}")
+    n, unit = match.group(1), match.group(2)
+    return n + {"m": "min", "h": "h", "d": "D", "wk": "W", "mo": "MS"}[unit]
+
+
+class DataProvider:
+    """Antarmuka penyedia data pasar"""
+
+    name = "base"
+
+    def history(self, ticker, start=None, end=None, period=None, interval="1d"):
+        """Candle OHLCV dengan kolom Open/High/Low/Close/Volume dan index waktu"""
+        raise NotImplementedError
+
+    def history_many(self, tickers, start=None, end=None, period=None, interval="1d"):
+        """Candle banyak ticker sekaligus -> dict ticker -> DataFrame. Default: satu per satu"""
+        return {ticker: self.history(ticker, start=start, end=end, period=period, interval=interval)
+                for ticker in tickers}
+
+    def info(self, ticker):
+        """Metadata ticker (harga terkini, market cap, volume). dict kosong jika tidak tersedia"""
+        return {}
+
+
+class YFinanceProvider(DataProvider):
+    """Semua request lewat penjadwal bersama (rate limit, retry/backoff, penggabungan request identik)"""
+
+    name = "yfinance"
+
+    def history(self, ticker, start=None, end=None, period=None, interval="1d"):
+        import yfinance as yf
+
+        def fetch():
+            t = yf.Ticker(ticker)
+            if start is None and end is None:
+                return t.history(period=period or "max", interval=interval)
+            return t.history(start=start, end=end, interval=interval)
+
+        key = ("history", ticker, str(start), str(end), period, interval)
+        return get_scheduler().call(key, fetch)
+
+    def history_many(self, tickers, start=None, end=None, period=None, interval="1d"):
+        """Satu request history per ticker (masing-masing satu token scheduler) di pool terbatas.
+        Ticker yang gagal atau belum selesai dalam TICKER_TIMEOUT tidak ada di hasil."""
+        frames, errors, _ = run_bounded(
+            lambda ticker: self.history(ticker, start=start, end=end, period=period, interval=interval), tickers)
+        for ticker, e in errors.items():
+            print(f"Gagal mengambil history {ticker}: {e}")
+        return frames
+
+    def info(self, ticker):
+        import yfinance as yf
+        return get_scheduler().call(("info", ticker), lambda: yf.Ticker(ticker).info)
+
+
+class ReplayProvider(DataProvider):
+    """Menyajikan candle dari file lokal <dir>/<ticker>_<interval>.parquet (atau .csv).
+    Jika file tidak ada dan synthetic=True, dibuat data sintetis yang berakhir hari ini."""
+
+    name = "replay"
+
+    def __init__(self, directory=DEFAULT_REPLAY_DIR, latency=0.0, synthetic=True, synthetic_years=5):
+        self.directory = directory
+        self.latency = latency
+        self.synthetic = synthetic
+        self.synthetic_years = synthetic_years
+        self._frames = {}
+        self._lock = threading.Lock()
+
+    def _path(self, ticker, interval, ext):
+        return os.path.join(self.directory, f"{ticker}_{interval}.{ext}")
+
+    def _load(self, ticker, interval):
+        key = (ticker, interval)
+        with self._lock:
+            if key in self._frames:
+                return self._frames[key]
+
+            parquet_path, csv_path = self._path(ticker, interval, "parquet"), self._path(ticker, interval, "csv")
+            if os.path.exists(parquet_path):
+                df = pd.read_parquet(parquet_path)
+            elif os.path.exists(csv_path):
+                df = pd.read_csv(csv_path, index_col=0, parse_dates=True)
+            elif self.synthetic:
+                from synthetic_data import generate_ohlcv
+                freq = interval_to_freq(interval)
+                probe = pd.date_range(end=pd.Timestamp.now().floor(freq), periods=2, freq=freq)
+                periods = int(pd.Timedelta(days=365 * self.synthetic_years) / (probe[1] - probe[0]))
+                start = probe[-1] - (probe[1] - probe[0]) * (periods - 1)
+                df = generate_ohlcv(ticker, start=start, periods=periods, freq=freq)
+            else:
+                df = pd.DataFrame()
+
+            self._frames[key] = df
+            return df
+
+    def history(self, ticker, start=None, end=None, period=None, interval="1d"):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._history(ticker, start, end, period, interval)
+
+    def _history(self, ticker, start, end, period, interval):
+        df = self._load(ticker, interval)
+        if df.empty:
+            return df
+
+        if start is None and end is None:
+            start = period_to_start(period)
+        if start is not None:
+            df = df.loc[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df.loc[df.index < pd.Timestamp(end)]
+        return df.copy()
+
+    def history_many(self, tickers, start=None, end=None, period=None, interval="1d"):
+        # satu "request" untuk semua ticker -> latency hanya sekali
+        if self.latency:
+            time.sleep(self.latency)
+        return {ticker: self._history(ticker, start, end, period, interval) for ticker in tickers}
+
+    def info(self, ticker):
+        if self.latency:
+            time.sleep(self.latency)
+        return {}
+
+    def record(self, ticker, df, interval="1d"):
+        """Simpan candle (misalnya dari store yfinance) sebagai rekaman untuk replay"""
+        os.makedirs(self.directory, exist_ok=True)
+        df.to_parquet(self._path(ticker, interval, "parquet"))
+        with self._lock:
+            self._frames.pop((ticker, interval), None)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def provider_from_env():
+    name = os.environ.get("DATA_PROVIDER", "yfinance").lower()
+    if name == "replay":
+        return ReplayProvider(
+            directory=os.environ.get("REPLAY_DIR", DEFAULT_REPLAY_DIR),
+            latency=float(os.environ.get("REPLAY_LATENCY", "0")),
+        )
+    if name == "yfinance":
+        return YFinanceProvider()
+    raise ValueError(f"DATA_PROVIDER tidak dikenal: {name}")
+
+
+def get_provider():
+    """Provider aktif (dibuat sekali dari environment variable)"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = provider_from_env()
+        return _provider
+
+
+def set_provider(provider):
+    """Ganti provider aktif (untuk benchmark/pengujian)"""
+    global _provider
+    with _provider_lock:
+        _provider = provider
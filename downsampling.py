@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+# Agregasi OHLC di sisi server untuk chart candlestick rentang panjang.
+# Jumlah candle yang dikirim ke browser dibatasi oleh "point budget", berapapun rentangnya:
+# 1. resample kalender (harian -> mingguan -> bulanan) jika ada yang muat di budget
+# 2. kalau tidak, bucket berdasarkan jumlah baris (tetap mempertahankan open/high/low/close)
+
+# Budget default jumlah candle per chart
+MAX_CHART_POINTS = 400
+
+# Urutan level agregasi kalender dari paling detail ke paling kasar
+RESAMPLE_LEVELS = [
+    ("15min", "15 menit"),
+    ("1h", "1 jam"),
+    ("4h", "4 jam"),
+    ("1D", "harian"),
+    ("W-MON", "mingguan"),
+    ("MS", "bulanan"),
+]
+
+OHLC_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def resample_ohlc(df, rule):
+    """Resample candle ke rule pandas (mis. 'W-MON', 'MS') dengan agregasi OHLC yang benar"""
+    agg = {col: how for col, how in OHLC_AGG.items() if col in df.columns}
+    # label='left' agar tanggal candle = awal periode (sama seperti candle harian)
+    return df.resample(rule, label='left', closed='left').agg(agg).dropna(subset=['Close'])
+
+
+def bucket_ohlc(df, max_points):
+    """Gabungkan baris berurutan ke max_points bucket dengan ukuran (hampir) sama"""
+    n = len(df)
+    edges = np.linspace(0, n, num=max_points + 1).astype(int)
+    bucket_ids = np.repeat(np.arange(max_points), np.diff(edges))
+    agg = {col: how for col, how in OHLC_AGG.items() if col in df.columns}
+    grouped = df.groupby(bucket_ids).agg(agg)
+    # tiap bucket diberi waktu candle pertamanya
+    grouped.index = df.index[edges[:-1][np.diff(edges) > 0]]
+    grouped.index.name = df.index.name
+    return grouped
+
+
+def _median_step(index):
+    if len(index) < 2:
+        return pd.Timedelta(days=1)
+    return pd.Series(index).diff().median()
+
+
+def downsample_ohlc(df, max_points=MAX_CHART_POINTS):
+    """Kembalikan (df_chart, label_agregasi) dengan jumlah candle <= max_points"""
+    if len(df) <= max_points:
+        return df, "asli"
+
+    base_step = _median_step(df.index)
+    span = df.index[-1] - df.index[0]
+    for rule, label in RESAMPLE_LEVELS:
+        probe = pd.date_range("2000-01-03", periods=2, freq=rule)
+        step = probe[1] - probe[0]
+        # level yang lebih detail dari data asli tidak berguna
+        if step <= base_step:
+            continue
+        if span / step <= max_points:
+            resampled = resample_ohlc(df, rule)
+            if len(resampled) <= max_points:
+                return resampled, label
+
+    return bucket_ohlc(df, max_points), f"{int(np.ceil(len(df) / max_points))} candle per titik"
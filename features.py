@@ -0,0 +1,246 @@
+import os
+import json
+import math
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from candle_store import OHLCV_COLS, store_dir, get_candles, load_candles, write_frame
+from telemetry import span
+
+# Satu-satunya implementasi feature engineering (Log_Ret, RSI, MACD, ATR) untuk
+# Home/Detail, halaman Prediction dan UjiCobaModel.
+# - compute_features(): versi vectorized pandas untuk DataFrame sembarang
+# - IndicatorState: versi inkremental O(1) per candle, state-nya di-checkpoint di samping store candle
+
+FEATURES = ['Log_Ret', 'RSI', 'MACD', 'MACD_Signal', 'ATR', 'Volume']
+INDICATOR_COLS = ['Log_Ret', 'RSI', 'MACD', 'MACD_Signal', 'ATR']
+LOOKBACK = 60
+
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+EMA_FAST = 12
+EMA_SLOW = 26
+EMA_SIGNAL = 9
+
+
+def compute_features(df):
+    """Hitung semua indikator sekaligus (vectorized) lalu buang baris warm-up"""
+    df = df.copy()
+
+    # Log Return
+    df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
+
+    # RSI (momentum)
+    delta = df['Close'].diff()
+    gain = delta.clip(lower=0).rolling(window=RSI_WINDOW).mean()
+    loss = (-delta.clip(upper=0)).rolling(window=RSI_WINDOW).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    # MACD (trend)
+    ema12 = df['Close'].ewm(span=EMA_FAST, adjust=False).mean()
+    ema26 = df['Close'].ewm(span=EMA_SLOW, adjust=False).mean()
+    df['MACD'] = ema12 - ema26
+    df['MACD_Signal'] = df['MACD'].ewm(span=EMA_SIGNAL, adjust=False).mean()
+
+    # ATR (volatilitas)
+    high_low = df['High'] - df['Low']
+    high_close = np.abs(df['High'] - df['Close'].shift(1))
+    low_close = np.abs(df['Low'] - df['Close'].shift(1))
+    ranges = pd.concat([high_low, high_close, low_close], axis=1)
+    true_range = ranges.max(axis=1)
+    df['ATR'] = true_range.rolling(window=ATR_WINDOW).mean()
+
+    # Buang baris kosong akibat shifting
+    df.dropna(inplace=True)
+    return df
+
+
+def _ema_alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+class IndicatorState:
+    """State indikator inkremental: cukup simpan EMA, jendela 14 gain/loss/TR dan close terakhir"""
+
+    def __init__(self):
+        self.last_ts = None
+        self.prev_close = None
+        self.ema_fast = None
+        self.ema_slow = None
+        self.signal = None
+        self.gains = deque(maxlen=RSI_WINDOW)
+        self.losses = deque(maxlen=RSI_WINDOW)
+        self.true_ranges = deque(maxlen=ATR_WINDOW)
+
+    def copy(self):
+        return IndicatorState.from_dict(self.to_dict())
+
+    def update(self, ts, high, low, close):
+        """Masukkan satu candle baru, kembalikan indikatornya (None selama masa warm-up)"""
+        if self.prev_close is None:
+            log_ret = math.nan
+            true_range = high - low
+            self.ema_fast = self.ema_slow = close
+            self.signal = 0.0
+        else:
+            log_ret = math.log(close / self.prev_close)
+            delta = close - self.prev_close
+            self.gains.append(max(delta, 0.0))
+            self.losses.append(max(-delta, 0.0))
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+
+            a_fast, a_slow, a_signal = _ema_alpha(EMA_FAST), _ema_alpha(EMA_SLOW), _ema_alpha(EMA_SIGNAL)
+            self.ema_fast = a_fast * close + (1 - a_fast) * self.ema_fast
+            self.ema_slow = a_slow * close + (1 - a_slow) * self.ema_slow
+            self.signal = a_signal * (self.ema_fast - self.ema_slow) + (1 - a_signal) * self.signal
+
+        self.true_ranges.append(true_range)
+        self.prev_close = close
+        self.last_ts = pd.Timestamp(ts)
+
+        if len(self.gains) < RSI_WINDOW or len(self.true_ranges) < ATR_WINDOW:
+            return None
+
+        avg_gain = sum(self.gains) / RSI_WINDOW
+        avg_loss = sum(self.losses) / RSI_WINDOW
+        if avg_loss == 0:
+            rsi = 100.0 if avg_gain > 0 else math.nan
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+
+        return {
+            'Log_Ret': log_ret,
+            'RSI': rsi,
+            'MACD': self.ema_fast - self.ema_slow,
+            'MACD_Signal': self.signal,
+            'ATR': sum(self.true_ranges) / ATR_WINDOW,
+        }
+
+    def update_frame(self, candles):
+        """Terapkan banyak candle berurutan, kembalikan DataFrame baris yang sudah valid"""
+        rows, index = [], []
+        highs, lows, closes = candles['High'].values, candles['Low'].values, candles['Close'].values
+        for ts, high, low, close in zip(candles.index, highs, lows, closes):
+            row = self.update(ts, float(high), float(low), float(close))
+            if row is not None and not any(math.isnan(v) for v in row.values()):
+                rows.append(row)
+                index.append(ts)
+
+        indicators = pd.DataFrame(rows, index=pd.DatetimeIndex(index, name=candles.index.name),
+                                  columns=INDICATOR_COLS, dtype='float64')
+        return candles.loc[indicators.index, OHLCV_COLS].join(indicators)
+
+    def to_dict(self):
+        return {
+            'last_ts': self.last_ts.isoformat() if self.last_ts is not None else None,
+            'prev_close': self.prev_close,
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'signal': self.signal,
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'true_ranges': list(self.true_ranges),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.last_ts = pd.Timestamp(data['last_ts']) if data.get('last_ts') else None
+        state.prev_close = data['prev_close']
+        state.ema_fast = data['ema_fast']
+        state.ema_slow = data['ema_slow']
+        state.signal = data['signal']
+        state.gains.extend(data['gains'])
+        state.losses.extend(data['losses'])
+        state.true_ranges.extend(data['true_ranges'])
+        return state
+
+
+# CHECKPOINT (di folder yang sama dengan store candle)
+
+def state_path(ticker, interval="1d"):
+    return os.path.join(store_dir(), f"{ticker}_{interval}.state.json")
+
+
+def feature_path(ticker, interval="1d"):
+    return os.path.join(store_dir(), f"{ticker}_{interval}.features.parquet")
+
+
+def _load_checkpoint(ticker, interval):
+    try:
+        with open(state_path(ticker, interval), 'r') as f:
+            state = IndicatorState.from_dict(json.load(f))
+        feats = pd.read_parquet(feature_path(ticker, interval))
+    except Exception:
+        return None, None
+    # State & frame fitur adalah dua file: pembaca bisa mendapat state lama + fitur baru dari proses lain.
+    # Setelah warm-up, baris fitur terakhir selalu = last_ts state; kalau tidak, checkpoint dibangun ulang
+    # (kalau tidak, candle yang sama diterapkan dua kali dan index duplikat masuk ke window model)
+    if not feats.empty and (feats.index[-1] != state.last_ts or not feats.index.is_unique):
+        return None, None
+    return state, feats
+
+
+def _save_checkpoint(ticker, interval, state, feats):
+    write_frame(feats, feature_path(ticker, interval))
+    path = state_path(ticker, interval)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp_path, path)
+
+
+def update_features(ticker, interval="1d", candles=None):
+    """Perbarui frame fitur dari checkpoint: hanya candle baru yang dihitung (O(1) per candle)"""
+    if candles is None:
+        candles = load_candles(ticker, interval)
+    if candles.empty:
+        return pd.DataFrame()
+
+    state, feats = _load_checkpoint(ticker, interval)
+    # Checkpoint tidak cocok dengan store (store dibangun ulang/terpotong) -> hitung ulang dari awal
+    if state is None or state.last_ts is None or state.last_ts not in candles.index:
+        state, feats = IndicatorState(), None
+
+    # Candle terakhir bisa masih berjalan (belum close), jadi tidak ikut di-checkpoint
+    closed = candles.loc[(candles.index > state.last_ts) & (candles.index < candles.index[-1])] \
+        if state.last_ts is not None else candles.iloc[:-1]
+    if not closed.empty:
+        new_feats = state.update_frame(closed)
+        feats = new_feats if feats is None or feats.empty else pd.concat([feats, new_feats])
+        _save_checkpoint(ticker, interval, state, feats)
+    elif feats is None:
+        feats = state.update_frame(closed)
+
+    # Candle berjalan dihitung di salinan state
+    live = candles.iloc[-1:]
+    if state.last_ts is None or live.index[-1] > state.last_ts:
+        live_feats = state.copy().update_frame(live)
+        if not live_feats.empty:
+            feats = pd.concat([feats, live_feats]) if not feats.empty else live_feats
+    return feats
+
+
+def get_features(ticker, start=None, end=None, interval="1d", refresh=True):
+    """Candle + indikator dari store (refresh inkremental), dipotong ke [start, end)"""
+    with span("fetch.candles"):
+        candles = get_candles(ticker, interval=interval, refresh=refresh)
+    with span("features.update"):
+        df = update_features(ticker, interval, candles)
+    if df.empty:
+        return df
+
+    if start is not None:
+        df = df.loc[df.index >= pd.Timestamp(start)]
+    if end is not None:
+        df = df.loc[df.index < pd.Timestamp(end)]
+    return df.copy()
+
+
+def closed_candles(df):
+    """Baris yang candle-nya sudah close. Candle terakhir (candle harian UTC yang masih berjalan) dibuang,
+    sama seperti checkpoint di update_features, agar forecast yang di-key per candle tidak dibekukan
+    dari candle setengah jadi"""
+    return df.iloc[:-1]
@@ -0,0 +1,99 @@
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+from forecasting import forecast_to_dict, forecast_from_dict
+from artifacts import load_bundle, model_paths, file_hash
+import live_accuracy
+
+# Cache hasil forecast di disk, dipakai bersama oleh semua sesi/proses dan tetap ada setelah restart.
+# Key = (ticker, timestamp candle terakhir, hash file .keras + scaler): forecast hanya berubah
+# kalau ada candle harian baru atau file model/scaler diganti.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'data', 'forecasts')
+
+# Jumlah maksimum entry, yang paling lama tidak dipakai (LRU) dihapus duluan
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+
+
+def model_fingerprint(ticker):
+    """Hash gabungan file model dan scaler milik ticker (dari bundle artefak jika masih valid)"""
+    bundle = load_bundle(ticker)
+    if bundle is not None:
+        return bundle["fingerprint"]
+    return hashlib.sha256("".join(file_hash(p) for p in model_paths(ticker)).encode()).hexdigest()
+
+
+def cache_key(ticker, last_ts, fingerprint, variant=""):
+    """last_ts harus candle yang sudah close (features.closed_candles): candle berjalan berubah dengan
+    timestamp yang sama. variant membedakan jenis hasil untuk input yang sama (mis. "mc-dropout" = forecast
+    + pita ketidakpastian)"""
+    raw = f"{ticker}|{pd.Timestamp(last_ts).isoformat()}|{fingerprint}"
+    if variant:
+        raw += f"|{variant}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def get(key):
+    """Ambil forecast dari cache (None jika belum ada)"""
+    path = _entry_path(key)
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        # perbarui mtime sebagai penanda "terakhir dipakai" untuk LRU
+        os.utime(path, None)
+        return forecast_from_dict(data["forecast"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put(key, ticker, forecast):
+    """Simpan forecast (tulis atomik) lalu jalankan eviksi LRU"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"ticker": ticker, "forecast": forecast_to_dict(forecast)}, f)
+    os.replace(tmp_path, path)
+    _evict()
+
+
+def _evict():
+    with _lock:
+        try:
+            entries = [e for e in os.scandir(CACHE_DIR) if e.name.endswith('.json')]
+        except OSError:
+            return
+        if len(entries) <= MAX_ENTRIES:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - MAX_ENTRIES]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def get_or_compute(ticker, last_ts, compute_fn, force=False, variant=""):
+    """Kembalikan forecast dari cache, atau hitung dengan compute_fn() lalu simpan.
+    force=True selalu menghitung ulang (tombol Re-Analysis)."""
+    fingerprint = model_fingerprint(ticker)
+    key = cache_key(ticker, last_ts, fingerprint, variant)
+    if not force:
+        cached = get(key)
+        if cached is not None:
+            return cached
+
+    forecast = compute_fn()
+    put(key, ticker, forecast)
+    # forecast baru diterbitkan -> dicatat untuk pemantauan akurasi live (cache hit sudah tercatat)
+    live_accuracy.log_forecast(ticker, forecast, fingerprint)
+    return forecast
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from features import FEATURES, LOOKBACK
+from telemetry import span
+
+# Logika prediksi 7 hari ke depan, dipakai halaman Prediction (dan job lain) tanpa Streamlit.
+
+HORIZON = 7
+
+# Mode probabilistik: N jalur stokastik dihitung dalam SATU forward pass batch (N, lookback, fitur)
+UNCERTAINTY_SAMPLES = 200
+BAND_PERCENTILES = (5, 50, 95)
+# Besar gangguan bootstrap relatif terhadap perubahan antar-hari fitur di window itu sendiri
+BOOTSTRAP_NOISE = 0.5
+# Kedua metode tidak sebanding: bootstrap hanya mengukur sensitivitas model terhadap input (pitanya jauh
+# lebih sempit dari MC dropout), jadi cache & label UI selalu membedakan metodenya
+BAND_VARIANTS = {"mc_dropout": "mc-dropout", "bootstrap": "mc-bootstrap"}
+BAND_LABELS = {"mc_dropout": "MC dropout", "bootstrap": "input bootstrap"}
+
+
+def latest_window(df, lookback=LOOKBACK, features=FEATURES):
+    """Window input terakhir (lookback x fitur), belum di-scale"""
+    return df[features].values[-lookback:]
+
+
+def predict_log_returns(model, scaler, windows):
+    """Batch window (n, lookback, fitur) belum di-scale -> log-return (n, HORIZON)"""
+    scaled = scale_windows(scaler, windows)
+
+    # Inferensi
+    with span("inference.predict"):
+        pred_scaled = model.predict(scaled, verbose=0)
+    return unscale_log_returns(scaler, pred_scaled)
+
+
+def scale_windows(scaler, windows):
+    windows = np.asarray(windows, dtype='float64')
+    n, lookback, n_features = windows.shape
+    with span("inference.scale"):
+        return scaler.transform(windows.reshape(-1, n_features)).reshape(n, lookback, n_features)
+
+
+def unscale_log_returns(scaler, pred_scaled):
+    # inverse MinMaxScaler untuk kolom 0 (Log_Ret): (x - min_) / scale_
+    return (np.asarray(pred_scaled) - scaler.min_[0]) / scaler.scale_[0]
+
+
+def supports_mc_dropout(model):
+    """Model Keras (punya layer Dropout aktif saat training=True); artefak TFLite tidak"""
+    return hasattr(model, 'layers') and any(type(layer).__name__ == 'Dropout' for layer in model.layers)
+
+
+def perturb_window(window, n_samples=UNCERTAINTY_SAMPLES, noise=BOOTSTRAP_NOISE, seed=None):
+    """N salinan window, tiap baris diganggu perubahan antar-hari yang diambil acak (bootstrap) dari window itu"""
+    window = np.asarray(window, dtype='float64')
+    rng = np.random.default_rng(seed)
+    diffs = np.diff(window, axis=0)
+    picks = rng.integers(0, len(diffs), size=(n_samples, len(window)))
+    return window[np.newaxis] + noise * diffs[picks]
+
+
+def sample_log_returns(model, scaler, window, n_samples=UNCERTAINTY_SAMPLES, seed=None, method=None):
+    """Log-return stokastik (n_samples, HORIZON) dalam satu panggilan model.
+    MC dropout jika model mendukung (kecuali method="bootstrap"), selain itu bootstrap window input.
+    Kembalikan (samples, metode)."""
+    if method != "bootstrap" and supports_mc_dropout(model):
+        scaled = scale_windows(scaler, np.repeat(np.asarray(window)[np.newaxis], n_samples, axis=0))
+        with span("inference.predict_mc"):
+            pred_scaled = model(scaled.astype('float32'), training=True)
+        return unscale_log_returns(scaler, pred_scaled), "mc_dropout"
+
+    with span("inference.predict_mc"):
+        samples = predict_log_returns(model, scaler, perturb_window(window, n_samples, seed=seed))
+    return samples, "bootstrap"
+
+
+def forecast_bands(df, samples, method, percentiles=BAND_PERCENTILES):
+    """Persentil harga per hari dari jalur-jalur sampel: {"p5": [...], "p50": [...], ...}"""
+    last_price = float(df['Close'].iloc[-1])
+    paths = last_price * np.exp(np.cumsum(samples, axis=1))
+    levels = np.percentile(paths, percentiles, axis=0)
+    bands = {f"p{p}": [float(v) for v in level] for p, level in zip(percentiles, levels)}
+    return dict(bands, method=method, samples=int(len(samples)), percentiles=list(percentiles))
+
+
+def forecast_prices(model, scaler, df, lookback=LOOKBACK, features=FEATURES):
+    """Prediksi harga HORIZON hari ke depan dari `lookback` baris fitur terakhir"""
+    window = latest_window(df, lookback, features)
+    pred_log_ret = predict_log_returns(model, scaler, window[np.newaxis])[0]
+    return build_forecast(df, pred_log_ret)
+
+
+def build_forecast(df, pred_log_ret):
+    """Ubah log-return prediksi menjadi jalur harga mulai dari close terakhir df"""
+    # Konversi Harga
+    last_price = float(df['Close'].iloc[-1])
+    last_date = df.index[-1]
+
+    future_dates = []
+    future_prices = []
+    changes_pct = []
+
+    current_p = last_price
+    for i, log_r in enumerate(pred_log_ret):
+        next_p = current_p * np.exp(log_r)
+        # Hitung persentase perubahan dari hari sebelumnya
+        change = ((next_p - current_p) / current_p) * 100
+
+        future_prices.append(float(next_p))
+        changes_pct.append(float(change))
+        future_dates.append(last_date + timedelta(days=i+1))
+
+        current_p = next_p
+
+    return {
+        "last_date": last_date,
+        "last_price": last_price,
+        "dates": future_dates,
+        "prices": future_prices,
+        "changes": changes_pct,
+    }
+
+
+def forecast_to_dict(forecast):
+    """Versi JSON-friendly (tanggal sebagai string ISO)"""
+    return dict(forecast,
+                last_date=pd.Timestamp(forecast["last_date"]).isoformat(),
+                dates=[pd.Timestamp(d).isoformat() for d in forecast["dates"]])
+
+
+def forecast_from_dict(data):
+    return dict(data,
+                last_date=pd.Timestamp(data["last_date"]),
+                dates=[pd.Timestamp(d) for d in data["dates"]])
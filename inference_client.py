@@ -0,0 +1,26 @@
+import os
+import json
+import urllib.request
+import numpy as np
+
+# Client tipis untuk inference_server.py (tanpa TensorFlow).
+# Aktif jika environment variable INFERENCE_URL di-set, misalnya http://127.0.0.1:8765
+
+INFERENCE_URL = os.environ.get("INFERENCE_URL")
+REQUEST_TIMEOUT = 10
+
+
+def is_enabled():
+    return bool(INFERENCE_URL)
+
+
+def predict_log_returns(ticker, windows, url=None, timeout=REQUEST_TIMEOUT):
+    """Kirim batch window (n, lookback, fitur) belum di-scale -> log-return (n, HORIZON)"""
+    payload = json.dumps({
+        "ticker": ticker,
+        "windows": np.asarray(windows, dtype='float64').tolist(),
+    }).encode()
+    request = urllib.request.Request(f"{(url or INFERENCE_URL).rstrip('/')}/predict", data=payload,
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return np.asarray(json.loads(response.read())["log_returns"])
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import queue
+import argparse
+import threading
+import warnings
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import numpy as np
+from features import FEATURES, LOOKBACK
+from forecasting import predict_log_returns
+from model_registry import get_registry
+
+# Server inferensi lokal (di luar proses Streamlit).
+# Semua model dimuat sekali di sini; replika Streamlit hanya mengirim window fitur lewat HTTP.
+# Request untuk ticker yang sama yang datang hampir bersamaan digabung menjadi satu forward pass.
+#
+# Jalankan:  python inference_server.py --port 8765
+# Lalu set:  INFERENCE_URL=http://127.0.0.1:8765  sebelum menjalankan streamlit
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Jendela waktu (detik) untuk mengumpulkan request sebelum forward pass, dan ukuran batch maksimum
+BATCH_WINDOW = 0.01
+MAX_BATCH = 64
+# Batas tunggu hasil satu request (detik); batcher yang macet tidak menggantung handler selamanya
+RESULT_TIMEOUT = 30
+
+
+class MicroBatcher:
+    """Antrian per ticker: request yang masuk dalam BATCH_WINDOW diprediksi dalam satu batch"""
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        # model dimuat di sini agar ticker tanpa model langsung gagal; setelahnya diambil dari registry (LRU)
+        get_registry().get(ticker)
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=f"batcher-{ticker}", daemon=True)
+        self.thread.start()
+
+    def submit(self, window):
+        """ValueError jika bentuk window bukan (LOOKBACK, jumlah fitur), agar satu batch selalu bisa di-stack"""
+        window = np.asarray(window, dtype='float64')
+        if window.shape != (LOOKBACK, len(FEATURES)):
+            raise ValueError(f"Window harus berbentuk {(LOOKBACK, len(FEATURES))}, bukan {window.shape}")
+        future = Future()
+        self.requests.put((window, future))
+        return future
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                windows = np.stack([window for window, _ in batch])
+                model, scaler = get_registry().get(self.ticker)
+                log_returns = predict_log_returns(model, scaler, windows)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), row in zip(batch, log_returns):
+                future.set_result(row.tolist())
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(ticker):
+    with _batchers_lock:
+        if ticker not in _batchers:
+            _batchers[ticker] = MicroBatcher(ticker)
+        return _batchers[ticker]
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """POST /predict {"ticker": ..., "windows": [[[...]]]} -> {"log_returns": [[...]]}"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "models": sorted(_batchers)})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length))
+            batcher = get_batcher(payload["ticker"])
+            futures = [batcher.submit(window) for window in payload["windows"]]
+            self._send_json(200, {"log_returns": [future.result(timeout=RESULT_TIMEOUT) for future in futures]})
+        except TimeoutError:
+            self._send_json(504, {"error": f"Inferensi melebihi {RESULT_TIMEOUT} detik"})
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        # akses log per request terlalu ramai untuk server inferensi
+        pass
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    print(f"Inference server berjalan di http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server inferensi LSTM dengan micro-batching")
+    parser.add_argument("--host", default=os.environ.get("INFERENCE_HOST", DEFAULT_HOST))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("INFERENCE_PORT", DEFAULT_PORT)))
+    parser.add_argument("--preload", nargs="*", default=[], help="Ticker yang dimuat saat start")
+    args = parser.parse_args()
+
+    for ticker in args.preload:
+        get_batcher(ticker)
+    serve(args.host, args.port)
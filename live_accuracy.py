@@ -0,0 +1,183 @@
+import os
+import json
+import threading
+from collections import deque
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Akurasi live: setiap forecast yang diterbitkan dicatat di log append-only, lalu dicocokkan dengan
+# close harian yang datang kemudian. Error disimpan di window bergulir per horizon (hari ke-1..7)
+# dengan jumlah berjalan, jadi setiap close baru cukup O(1) per horizon, tanpa menjalankan ulang
+# UjiCobaModel.py.
+# Struktur:
+#   data/live_accuracy/<ticker>.forecasts.jsonl  -> log forecast (satu baris per forecast, tidak pernah diubah)
+#   data/live_accuracy/<ticker>.state.json       -> offset log yang sudah dibaca, forecast yang menunggu close,
+#                                                   window error per horizon
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LIVE_DIR = os.path.join(BASE_DIR, 'data', 'live_accuracy')
+
+# Jumlah pasangan (forecast, close) terakhir per horizon yang dihitung
+WINDOW = int(os.environ.get("LIVE_ACCURACY_WINDOW", "30"))
+
+STATE_VERSION = 1
+
+_lock = threading.Lock()
+
+
+def log_path(ticker):
+    return os.path.join(LIVE_DIR, f"{ticker}.forecasts.jsonl")
+
+
+def state_path(ticker):
+    return os.path.join(LIVE_DIR, f"{ticker}.state.json")
+
+
+def log_forecast(ticker, forecast, fingerprint=None):
+    """Catat forecast yang diterbitkan (satu baris, mode append -> aman untuk banyak proses)"""
+    os.makedirs(LIVE_DIR, exist_ok=True)
+    line = json.dumps({
+        "issued": datetime.now().isoformat(timespec='seconds'),
+        "origin": pd.Timestamp(forecast["last_date"]).isoformat(),
+        "fingerprint": fingerprint,
+        "dates": [pd.Timestamp(d).strftime('%Y-%m-%d') for d in forecast["dates"]],
+        "prices": [float(p) for p in forecast["prices"]],
+    })
+    with open(log_path(ticker), 'a') as f:
+        f.write(line + "\n")
+
+
+class RollingError:
+    """Window error berukuran tetap dengan jumlah berjalan: push O(1), RMSE/MAPE O(1)"""
+
+    def __init__(self, size=WINDOW, sq=(), ape=()):
+        self.sq = deque(sq, maxlen=size)
+        self.ape = deque(ape, maxlen=size)
+        self.sum_sq = float(sum(self.sq))
+        self.sum_ape = float(sum(self.ape))
+
+    def push(self, predicted, actual):
+        if len(self.sq) == self.sq.maxlen:
+            self.sum_sq -= self.sq[0]
+            self.sum_ape -= self.ape[0]
+        error = predicted - actual
+        sq, ape = error * error, abs(error) / abs(actual)
+        self.sq.append(sq)
+        self.ape.append(ape)
+        self.sum_sq += sq
+        self.sum_ape += ape
+
+    @property
+    def count(self):
+        return len(self.sq)
+
+    def rmse(self):
+        return float(np.sqrt(max(self.sum_sq, 0.0) / self.count))
+
+    def mape(self):
+        return 100 * max(self.sum_ape, 0.0) / self.count
+
+    def to_dict(self):
+        return {"sq": list(self.sq), "ape": list(self.ape)}
+
+
+def _load_state(ticker):
+    try:
+        with open(state_path(ticker), 'r') as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION and state.get("window") == WINDOW:
+            return state
+    except (OSError, ValueError):
+        pass
+    # state baru (atau ukuran window berubah): log dibaca ulang dari awal
+    return {"version": STATE_VERSION, "window": WINDOW, "offset": 0, "last_close": None,
+            "pending": {}, "horizons": {}}
+
+
+def _save_state(ticker, state):
+    path = state_path(ticker)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _read_new_forecasts(ticker, state):
+    """Baris log setelah offset terakhir (baris yang belum selesai ditulis dibaca di panggilan berikutnya)"""
+    try:
+        with open(log_path(ticker), 'rb') as f:
+            f.seek(state["offset"])
+            chunk = f.read()
+    except OSError:
+        return []
+    end = chunk.rfind(b"\n") + 1
+    state["offset"] += end
+    forecasts = []
+    for line in chunk[:end].splitlines():
+        try:
+            forecasts.append(json.loads(line))
+        except ValueError:
+            continue
+    return forecasts
+
+
+def update(ticker, closes, now=None):
+    """Cocokkan forecast baru di log dengan close harian baru (pd.Series ber-index tanggal UTC).
+    Candle terakhir (bisa masih berjalan) diabaikan. Kembalikan jumlah pasangan yang masuk ke window."""
+    # tanggal candle adalah UTC; jam lokal (mis. UTC+7) sudah "besok" sebelum candle UTC hari ini close
+    today = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz='UTC').tz_localize(None)
+    today = today.normalize()
+    with _lock:
+        state = _load_state(ticker)
+
+        # forecast baru -> antrean per tanggal target; forecast ulang untuk origin yang sama menimpa
+        for forecast in _read_new_forecasts(ticker, state):
+            for day, (date, price) in enumerate(zip(forecast["dates"], forecast["prices"]), start=1):
+                if state["last_close"] is None or date > state["last_close"]:
+                    state["pending"].setdefault(date, {})[f"{forecast['origin']}|{day}"] = price
+
+        windows = {int(day): RollingError(WINDOW, w["sq"], w["ape"]) for day, w in state["horizons"].items()}
+        matched = 0
+        # sama seperti features.update_features: baris terakhir tidak dianggap close
+        closed = closes.iloc[:-1]
+        closed = closed[(closed.index < today) & closed.notna()]
+        if state["last_close"] is not None:
+            closed = closed[closed.index > pd.Timestamp(state["last_close"])]
+
+        for ts, actual in closed.items():
+            date = ts.strftime('%Y-%m-%d')
+            for key, predicted in state["pending"].pop(date, {}).items():
+                day = int(key.rsplit("|", 1)[1])
+                windows.setdefault(day, RollingError(WINDOW)).push(predicted, float(actual))
+                matched += 1
+            state["last_close"] = date
+
+        if state["last_close"] is not None:
+            # target yang candle-nya tidak pernah ada (mis. data bolong) tidak akan cocok lagi
+            state["pending"] = {d: p for d, p in state["pending"].items() if d > state["last_close"]}
+        state["horizons"] = {str(day): w.to_dict() for day, w in sorted(windows.items())}
+        state["updated"] = datetime.now().isoformat(timespec='seconds')
+
+        os.makedirs(LIVE_DIR, exist_ok=True)
+        _save_state(ticker, state)
+        return matched
+
+
+def live_metrics(ticker):
+    """RMSE/MAPE bergulir per horizon dari state terakhir, None jika belum ada forecast yang tercocokkan"""
+    try:
+        with open(state_path(ticker), 'r') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    horizons = []
+    for day, w in sorted(state.get("horizons", {}).items(), key=lambda item: int(item[0])):
+        window = RollingError(WINDOW, w["sq"], w["ape"])
+        if window.count:
+            horizons.append({"day": int(day), "RMSE": round(window.rmse(), 8),
+                             "MAPE": round(window.mape(), 2), "n": window.count})
+    if not horizons:
+        return None
+    return {"window": state["window"], "last_close": state["last_close"],
+            "updated": state.get("updated"), "horizons": horizons}
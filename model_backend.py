@@ -0,0 +1,92 @@
+import os
+import threading
+import numpy as np
+from artifacts import MODELS_DIR, model_paths
+
+# Backend inferensi: pakai artefak TFLite (hasil ExportModels.py) dengan runtime kecil
+# (ai-edge-litert / tflite-runtime, CPU) jika tersedia, fallback ke Keras/TensorFlow.
+# Kedua backend punya method predict(X, verbose=0) yang sama, jadi pemanggil tidak perlu tahu.
+
+
+# Jumlah thread inferensi per proses (None = default runtime). Diatur lewat configure_threads()
+# agar beberapa worker paralel tidak saling berebut semua core CPU.
+_num_threads = None
+
+
+def configure_threads(n):
+    """Batasi thread inferensi TFLite & TensorFlow di proses ini (panggil sebelum model dimuat)"""
+    global _num_threads
+    _num_threads = n
+    for var in ("TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "OMP_NUM_THREADS"):
+        os.environ[var] = str(n)
+
+
+def tflite_path(ticker):
+    return os.path.join(MODELS_DIR, f"{ticker}_best_model.tflite")
+
+
+def _tflite_interpreter_class():
+    """Cari runtime TFLite paling ringan yang terpasang (None jika tidak ada)"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        return None
+
+
+class TFLiteModel:
+    """Pembungkus interpreter TFLite dengan antarmuka mirip keras Model.predict"""
+
+    def __init__(self, path, interpreter_class=None):
+        interpreter_class = interpreter_class or _tflite_interpreter_class()
+        if interpreter_class is None:
+            raise ImportError("Runtime TFLite (ai-edge-litert / tflite-runtime) tidak terpasang")
+        self.path = path
+        self.interpreter = interpreter_class(model_path=path, num_threads=_num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch_size = None
+        # interpreter tidak thread-safe, sementara sesi Streamlit berjalan di banyak thread
+        self.lock = threading.Lock()
+
+    def predict(self, X, verbose=0):
+        X = np.asarray(X, dtype='float32')
+        with self.lock:
+            if self.batch_size != len(X):
+                self.interpreter.resize_tensor_input(self.input_index, X.shape)
+                self.interpreter.allocate_tensors()
+                self.batch_size = len(X)
+            self.interpreter.set_tensor(self.input_index, X)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self.output_index).copy()
+
+
+def load_model(ticker, prefer_lite=True):
+    """Muat model ticker: TFLite jika artefak & runtime ada, selain itu file .keras"""
+    lite_path = tflite_path(ticker)
+    if prefer_lite and os.path.exists(lite_path):
+        try:
+            return TFLiteModel(lite_path)
+        except ImportError:
+            pass
+
+    from tensorflow.keras.models import load_model as load_keras_model
+    model_path, _ = model_paths(ticker)
+    return load_keras_model(model_path)
+
+
+def load_scaler(ticker):
+    """Scaler dari bundle artefak (.npz, tanpa pickle/sklearn); fallback ke pickle joblib lama"""
+    from artifacts import load_array_scaler
+    scaler = load_array_scaler(ticker)
+    if scaler is not None:
+        return scaler
+
+    import joblib
+    _, scaler_path = model_paths(ticker)
+    return joblib.load(scaler_path)
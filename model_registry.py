@@ -0,0 +1,122 @@
+import os
+import gc
+import threading
+from collections import OrderedDict
+import numpy as np
+from features import FEATURES, LOOKBACK
+from model_backend import load_model, load_scaler, tflite_path
+from artifacts import model_paths
+from telemetry import span
+
+# Registry model per proses dengan batas memori: model (TFLite/Keras) + scaler dimuat saat pertama
+# diminta, dan yang paling lama tidak dipakai (LRU) dilepas saat jumlah model atau perkiraan memorinya
+# melewati batas. Dengan universe ratusan koin, memori proses tetap datar.
+#
+#   MODEL_REGISTRY_MAX_MODELS=8 MODEL_REGISTRY_MAX_MB=512 MODEL_WARMUP=BTC-USD,ETH-USD streamlit run Home.py
+
+MAX_MODELS = int(os.environ.get("MODEL_REGISTRY_MAX_MODELS", "8"))
+MAX_BYTES = int(float(os.environ.get("MODEL_REGISTRY_MAX_MB", "512")) * 1024 * 1024)
+# Ticker yang dimuat + di-warm-up di background saat registry pertama dipakai (dipisah koma)
+WARMUP_TICKERS = [t for t in os.environ.get("MODEL_WARMUP", "").split(",") if t]
+
+# Pengali ukuran file -> perkiraan memori resident (bobot + buffer runtime/graph Keras)
+KERAS_MEMORY_FACTOR = 4
+TFLITE_MEMORY_FACTOR = 2
+
+
+def estimate_bytes(ticker, model):
+    """Perkiraan kasar memori satu model dari ukuran artefaknya"""
+    if hasattr(model, 'layers'):
+        return os.path.getsize(model_paths(ticker)[0]) * KERAS_MEMORY_FACTOR
+    return os.path.getsize(tflite_path(ticker)) * TFLITE_MEMORY_FACTOR
+
+
+def warm_up(model):
+    """Satu forward pass dummy agar tracing/alokasi tensor tidak dibayar request pertama"""
+    dummy = np.zeros((1, LOOKBACK, len(FEATURES)), dtype='float32')
+    model.predict(dummy, verbose=0)
+
+
+class ModelRegistry:
+    def __init__(self, max_models=MAX_MODELS, max_bytes=MAX_BYTES):
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (ticker, prefer_lite) -> (model, scaler, bytes)
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticker, prefer_lite=True):
+        """(model, scaler) untuk ticker; dimuat (sekali, walau diminta banyak thread) jika belum ada"""
+        key = (ticker, prefer_lite)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0], entry[1]
+
+            with span("registry.load"):
+                model = load_model(ticker, prefer_lite=prefer_lite)
+                scaler = load_scaler(ticker)
+            with span("registry.warmup"):
+                warm_up(model)
+
+            with self._lock:
+                self._entries[key] = (model, scaler, estimate_bytes(ticker, model))
+                self._loading.pop(key, None)
+                evicted = self._evict()
+            if evicted:
+                gc.collect()
+            return model, scaler
+
+    def _evict(self):
+        """Lepas model LRU sampai di bawah batas (model yang baru dimuat selalu dipertahankan)"""
+        evicted = []
+        while len(self._entries) > 1 and (len(self._entries) > self.max_models or self.resident_bytes() > self.max_bytes):
+            (ticker, _), _ = self._entries.popitem(last=False)
+            evicted.append(ticker)
+        if evicted:
+            print(f"Model dilepas dari registry (LRU): {', '.join(evicted)}")
+        return evicted
+
+    def resident_bytes(self):
+        return sum(entry[2] for entry in self._entries.values())
+
+    def loaded(self):
+        with self._lock:
+            return [ticker for ticker, _ in self._entries]
+
+    def warm_up_async(self, tickers, prefer_lite=True):
+        """Muat + warm-up beberapa ticker di thread background (gagal diabaikan)"""
+        def run():
+            for ticker in tickers:
+                try:
+                    self.get(ticker, prefer_lite)
+                except Exception as e:
+                    print(f"Warm-up model {ticker} gagal: {e}")
+
+        thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registry bersama (satu per proses); ticker MODEL_WARMUP di-warm-up saat pertama dibuat"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+            if WARMUP_TICKERS:
+                _registry.warm_up_async(WARMUP_TICKERS[:_registry.max_models])
+        return _registry
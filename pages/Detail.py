@@ -1,8 +1,11 @@
 import streamlit as st
 import plotly.graph_objects as go
-from utils import get_data_with_indikacators, get_market_summary, format_price, format_big_number, COINS
-from datetime import datetime, timedelta
+import pandas as pd
+from utils import get_quote, format_price, format_big_number, COINS
+from datetime import datetime
 from dateutil.relativedelta import relativedelta
+from downsampling import downsample_ohlc, MAX_CHART_POINTS
+from candle_array import load_array, slice_range, records_to_frame
 
 # 1. config & state
 st.set_page_config(
@@ -73,6 +76,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 3. Logika timeframe interaktif
+# Tanggal awal data yang digunakan untuk training model (opsi 'ALL')
+HISTORY_START = "2022-01-01"
+
+# Interval candle yang bisa dipilih. History intraday dibatasi Yahoo (1h: ~2 tahun, 15m: 60 hari),
+# jadi timeframe yang lebih panjang otomatis menampilkan seluruh data yang tersedia.
+INTERVALS = {'1d': '1D', '1h': '1H', '15m': '15M'}
+
 # helper untuk menghitung start date
 def get_start_date(timeframe):
     end_date = datetime.now()
@@ -83,9 +93,9 @@ def get_start_date(timeframe):
     elif timeframe == '1Y':
         start_date = end_date - relativedelta(years=1)
     elif timeframe == 'ALL':
-        start_date = datetime(2022, 1, 1)  # Tanggal awal data yang digunakan untuk training model
+        start_date = datetime.strptime(HISTORY_START, "%Y-%m-%d")
     else:
-        start_date = end_date - timedelta(months=6)  # Default ke 6 bulan
+        start_date = end_date - relativedelta(months=6)  # Default ke 6 bulan
     return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
 
 # 4. Header Section
@@ -94,9 +104,8 @@ def get_start_date(timeframe):
 if st.button("← Back to Market Overview"):
     st.switch_page("Home.py")
 
-# ambil data harga terbaru (realtime dari cache pendek)
-market_data, _ = get_market_summary()
-coin_info = next((item for item in market_data if item ['Ticker'] == selected_coin), None)
+# ambil data harga terbaru (cache pendek, hanya koin ini)
+coin_info = get_quote(selected_coin)
 current_price = coin_info['Price'] if coin_info else 0
 
 col_header_1, col_header_2 = st.columns([3, 1])
@@ -113,29 +122,66 @@ st.divider()
 
 # 5. Chart Interaktif
 st.write("### Price Chart")
-timeframe_selected = st.radio(
-    "Select Timeframe:",
-    options=['1M', '6M', '1Y', 'ALL'],
-    index=1,  # Default ke 6 bulan
-    horizontal=True,
-    label_visibility="collapsed"
-)
+col_interval, col_timeframe = st.columns([1, 2])
+with col_interval:
+    interval_selected = st.radio(
+        "Select Interval:",
+        options=list(INTERVALS),
+        format_func=INTERVALS.get,
+        index=0,
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+with col_timeframe:
+    timeframe_selected = st.radio(
+        "Select Timeframe:",
+        options=['1M', '6M', '1Y', 'ALL'],
+        index=1,  # Default ke 6 bulan
+        horizontal=True,
+        label_visibility="collapsed"
+    )
 
 start_date, end_date = get_start_date(timeframe_selected)
 
-with st.spinner(f"Loading data {timeframe_selected}..."):
-    df = get_data_with_indikacators(selected_coin, start_date, end_date, interval="1d")
+with st.spinner(f"Loading data {timeframe_selected} ({INTERVALS[interval_selected]})..."):
+    # Candle + indikator di-memory-map dari disk (satu file per ticker & interval, dipakai bersama
+    # semua sesi). Timeframe & zoom hanya memotong array (view tanpa copy) lewat binary search.
+    candles = load_array(selected_coin, interval_selected)
+    view = slice_range(candles, start_date) if candles is not None else None
+
+if view is not None and len(view) > 0:
+    # Slot chart diisi setelah slider zoom dibaca (slider tampil di bawah chart)
+    chart_slot = st.empty()
+
+    # Zoom sisi server: rentang yang dipilih diagregasi ulang dengan detail lebih tinggi
+    range_min = pd.Timestamp(int(view['ts'][0])).to_pydatetime()
+    range_max = pd.Timestamp(int(view['ts'][-1])).to_pydatetime()
+    if range_min < range_max:
+        zoom_start, zoom_end = st.slider(
+            "Zoom",
+            min_value=range_min,
+            max_value=range_max,
+            value=(range_min, range_max),
+            format="DD MMM YYYY" if interval_selected == '1d' else "DD MMM YYYY HH:mm",
+            key=f"zoom_{selected_coin}_{interval_selected}_{timeframe_selected}",
+        )
+        view = slice_range(view, zoom_start, zoom_end)
+
+    # Hanya rentang yang terlihat yang disalin ke DataFrame
+    df_view = records_to_frame(view)
+
+    # Batasi jumlah candle yang dikirim ke browser (resample mingguan/bulanan bila perlu)
+    df_chart, aggregation = downsample_ohlc(df_view, MAX_CHART_POINTS)
 
-if not df.empty:
     fig = go.Figure()
 
     # candlestick
     fig.add_trace(go.Candlestick(
-        x=df.index,
-        open=df['Open'],
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
+        x=df_chart.index,
+        open=df_chart['Open'],
+        high=df_chart['High'],
+        low=df_chart['Low'],
+        close=df_chart['Close'],
         name='Harga',
         increasing_line_color='#00FF00',
         decreasing_line_color='#FF0000',
@@ -166,8 +212,11 @@ if not df.empty:
         hovermode="x unified",
     )
 
-    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True, 'scrollZoom': True})
-    st.caption(f"Menampilkan data historis dari {start_date} hingga {end_date}. Gunakan mouse untuk zoom dan pan pada grafik.")
+    with chart_slot:
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True, 'scrollZoom': True})
+    st.caption(f"Menampilkan candle {INTERVALS[interval_selected]} dari {start_date} hingga {end_date} "
+               f"({len(df_chart)} candle, agregasi {aggregation}). "
+               f"Geser slider Zoom untuk melihat rentang lebih pendek dengan detail lebih tinggi.")
 
 else:
     st.warning(f"No data available for the selected timeframe {timeframe_selected}.")
\ No newline at end of file
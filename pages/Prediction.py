@@ -1,12 +1,18 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-import joblib
 import json
-from tensorflow.keras.models import load_model
 from datetime import datetime, timedelta
-import yfinance as yf
+from features import get_features, closed_candles
+from candle_store import load_candles
+from forecasting import (forecast_prices, latest_window, build_forecast, sample_log_returns, perturb_window,
+                         forecast_bands, supports_mc_dropout, UNCERTAINTY_SAMPLES, BAND_PERCENTILES,
+                         BAND_VARIANTS, BAND_LABELS)
+import inference_client
+from model_registry import get_registry
+import forecast_cache
+import live_accuracy
+from precomputed import load_latest, is_stale
+from telemetry import span
 from utils import COINS, format_price
 
 # --- 1. CONFIG & STATE ---
@@ -57,12 +63,12 @@ def load_metrics():
 metrics_data = load_metrics()
 coin_metrics = metrics_data.get(selected_coin, {"RMSE": 0, "MAPE": 0})
 
-@st.cache_resource
-def load_ml_assets(ticker):
+def load_ml_assets(ticker, prefer_lite=True):
     try:
-        model = load_model(f"models/{ticker}_best_model.keras")
-        scaler = joblib.load(f"scalers/{ticker}_scaler.pkl")
-        return model, scaler
+        # Dimuat hanya saat forecast benar-benar harus dihitung (cache miss);
+        # artefak TFLite dipakai jika ada, jadi TensorFlow tidak perlu di-import.
+        # Registry membatasi jumlah/memori model yang tetap dimuat (LRU)
+        return get_registry().get(ticker, prefer_lite=prefer_lite)
     except Exception as e:
         return None, None
 
@@ -75,6 +81,8 @@ with col2:
     if st.button("❮ Back To Previous"):
         st.switch_page("pages/Detail.py")
     if st.button("Re-Analysis (Re-Run)", type="primary"):
+        # paksa hitung ulang, lewati forecast cache
+        st.session_state['force_reanalysis'] = True
         st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -91,78 +99,134 @@ st.markdown(f"""
     </div>
 </div>
 """, unsafe_allow_html=True)
+# diisi setelah data harian dimuat (akurasi live butuh close terbaru)
+live_slot = st.empty()
 
-# --- 5. LOGIKA PREDIKSI (Bypass yfinance bug dengan history period="max") ---
-model, scaler = load_ml_assets(selected_coin)
+# Mode probabilistik: N jalur Monte Carlo dalam satu forward pass batch -> pita persentil
+probabilistic = st.toggle(
+    f"Probabilistic Forecast (Monte Carlo, {UNCERTAINTY_SAMPLES} samples)",
+    key="probabilistic_forecast",
+)
 
-if model is None or scaler is None:
-    st.error("Model atau Scaler tidak ditemukan. Pastikan file ada di folder 'models' dan 'scalers'.")
-    st.stop()
+# --- 5. LOGIKA PREDIKSI (hasil job batch -> forecast cache -> hitung langsung) ---
+force_reanalysis = st.session_state.pop('force_reanalysis', False)
 
-with st.spinner("Memproses algoritma LSTM..."):
-    # Trik Bypass yfinance: Tarik data maksimum, lalu potong
-    t = yf.Ticker(selected_coin)
-    df = t.history(period="1y", interval="1d") # Tarik 1 tahun terakhir agar pasti cukup
-    
-    if isinstance(df.columns, pd.MultiIndex):
-        df.columns = df.columns.get_level_values(0)
-    if df.index.tz is not None:
-        df.index = df.index.tz_localize(None)
+def compute_remote_forecast():
+    window = latest_window(df)
+    forecast = build_forecast(df, inference_client.predict_log_returns(selected_coin, [window])[0])
+    if probabilistic:
+        # server hanya menjalankan predict() biasa -> ketidakpastian dari bootstrap window input
+        samples = inference_client.predict_log_returns(selected_coin, perturb_window(window))
+        forecast["bands"] = forecast_bands(df, samples, "bootstrap")
+    return forecast
 
-    # Feature Engineering Cepat
-    df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
-    
-    delta = df['Close'].diff()
-    gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-    loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-    df['RSI'] = 100 - (100 / (1 + (gain / loss)))
-    
-    ema12 = df['Close'].ewm(span=12, adjust=False).mean()
-    ema26 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = ema12 - ema26
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift(1))
-    low_close = np.abs(df['Low'] - df['Close'].shift(1))
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    df['ATR'] = np.max(ranges, axis=1).rolling(window=14).mean()
-    
-    df.dropna(inplace=True)
+def band_method():
+    """Metode pita yang akan dipakai, ditentukan sebelum cache dibaca karena menjadi bagian key-nya"""
+    if inference_client.is_enabled():
+        # server hanya menjalankan predict() biasa -> bootstrap (juga saat fallback ke model lokal)
+        return "bootstrap"
+    # registry menyimpan model yang sudah dimuat, jadi cache hit berikutnya tidak memuat ulang
+    model, _ = load_ml_assets(selected_coin, prefer_lite=False)
+    return "mc_dropout" if model is not None and supports_mc_dropout(model) else "bootstrap"
 
-    # Persiapan Input Model
-    LOOKBACK = 60
-    FEATURES = ['Log_Ret', 'RSI', 'MACD', 'MACD_Signal', 'ATR', 'Volume']
-    
-    recent_data = df[FEATURES].values[-LOOKBACK:]
-    scaled_data = scaler.transform(recent_data)
-    X_input = scaled_data.reshape(1, LOOKBACK, len(FEATURES))
-    
-    # Inferensi
-    pred_scaled = model.predict(X_input, verbose=0)[0]
-    dummy_array = np.zeros((7, len(FEATURES)))
-    dummy_array[:, 0] = pred_scaled
-    pred_log_ret = scaler.inverse_transform(dummy_array)[:, 0]
-    
-    # Konversi Harga
-    last_price = df['Close'].iloc[-1]
-    last_date = df.index[-1]
-    
-    future_dates = []
-    future_prices = []
-    changes_pct = []
-    
-    current_p = last_price
-    for i, log_r in enumerate(pred_log_ret):
-        next_p = current_p * np.exp(log_r)
-        # Hitung persentase perubahan dari hari sebelumnya
-        change = ((next_p - current_p) / current_p) * 100 
-        
-        future_prices.append(next_p)
-        changes_pct.append(change)
-        future_dates.append(last_date + timedelta(days=i+1))
-        
-        current_p = next_p
+def compute_forecast():
+    # Jika server inferensi aktif, proses ini tidak perlu memuat TensorFlow sama sekali
+    if inference_client.is_enabled():
+        try:
+            return compute_remote_forecast()
+        except OSError as e:
+            # server mati / timeout / HTTP error (URLError turunan OSError) -> model lokal dari registry
+            print(f"Inference server tidak tersedia, pakai model lokal: {e}")
+
+    model, scaler = None, None
+    if method == "mc_dropout":
+        # MC dropout butuh model Keras (dropout tidak ada di artefak TFLite)
+        model, scaler = load_ml_assets(selected_coin, prefer_lite=False)
+    if model is None or scaler is None:
+        model, scaler = load_ml_assets(selected_coin)
+    if model is None or scaler is None:
+        st.error("Model atau Scaler tidak ditemukan. Pastikan file ada di folder 'models' dan 'scalers'.")
+        st.stop()
+
+    forecast = forecast_prices(model, scaler, df)
+    if probabilistic:
+        samples, used = sample_log_returns(model, scaler, latest_window(df), method=method)
+        forecast["bands"] = forecast_bands(df, samples, used)
+    return forecast
+
+def load_precomputed_forecast():
+    """Hasil job BatchForecast.py (tanpa TensorFlow & yfinance), None jika belum ada / model berubah / basi"""
+    result = load_latest(selected_coin)
+    if result is None:
+        return None, None
+    try:
+        if result["model_fingerprint"] != forecast_cache.model_fingerprint(selected_coin):
+            return None, None
+    except FileNotFoundError:
+        return None, None
+
+    # Data lokal saja, dipotong sampai candle yang dipakai job batch agar chart & forecast konsisten
+    local_df = get_features(selected_coin, start=datetime.now() - timedelta(days=365), interval="1d", refresh=False)
+    # job batch berhenti / tertinggal dari store -> hitung langsung, jangan tampilkan forecast lama
+    # (job batch memakai candle close terakhir, jadi dibandingkan dengan candle close terakhir di store)
+    closed_df = closed_candles(local_df)
+    if is_stale(result, closed_df.index[-1] if not closed_df.empty else None):
+        return None, None
+    local_df = local_df.loc[local_df.index <= result["last_candle"]]
+    if local_df.empty:
+        return None, None
+    return local_df, result["forecast"]
+
+with span("prediction.precomputed"):
+    # hasil job batch hanya berisi forecast deterministik
+    df, forecast = (None, None) if force_reanalysis or probabilistic else load_precomputed_forecast()
+
+if forecast is None:
+    with st.spinner("Memproses algoritma LSTM..."):
+        # 1 tahun terakhir: candle dari store + indikator dari modul features (sama dengan UjiCobaModel)
+        with span("prediction.features"):
+            df = get_features(selected_coin, start=datetime.now() - timedelta(days=365), interval="1d")
+        # forecast (dan key cache-nya) dari candle terakhir yang sudah close, bukan candle hari ini yang berjalan
+        df = closed_candles(df)
+        if df.empty:
+            st.error(f"Data historis {selected_coin} tidak tersedia. Cek koneksi internet.")
+            st.stop()
+
+        try:
+            # Forecast hanya berubah jika ada candle baru atau file model/scaler berubah
+            with span("prediction.forecast"):
+                method = band_method() if probabilistic else None
+                forecast = forecast_cache.get_or_compute(selected_coin, df.index[-1], compute_forecast,
+                                                         force=force_reanalysis,
+                                                         variant=BAND_VARIANTS[method] if method else "")
+        except FileNotFoundError:
+            st.error("Model atau Scaler tidak ditemukan. Pastikan file ada di folder 'models' dan 'scalers'.")
+            st.stop()
+
+# Akurasi live: close harian baru dicocokkan dengan forecast yang pernah diterbitkan (O(1) per close)
+with span("prediction.live_accuracy"):
+    try:
+        # close dari store lokal (df sudah tanpa candle berjalan; update() sendiri mengabaikan candle terakhir)
+        live_accuracy.update(selected_coin, load_candles(selected_coin, "1d")['Close'])
+    except OSError as e:
+        print(f"Update akurasi live {selected_coin} gagal: {e}")
+    live = live_accuracy.live_metrics(selected_coin)
+
+if live:
+    live_day1 = live["horizons"][0]
+    live_slot.markdown(f"""
+<div class="metric-container">
+    <span class="metric-title">Live MAPE (Day {live_day1['day']}):</span> <span class="metric-value">{live_day1['MAPE']}%</span>
+    <span class="metric-title" style="margin-left: 20px;">Live RMSE:</span> <span class="metric-value">{live_day1['RMSE']:,}</span><br>
+    <span class="metric-sub">Rolling over the last {live_day1['n']} matched forecasts (up to {live['window']}), closes through {live['last_close']}</span>
+</div>
+""", unsafe_allow_html=True)
+
+future_dates = forecast["dates"]
+future_prices = forecast["prices"]
+changes_pct = forecast["changes"]
+bands = forecast.get("bands")
+band_low, band_high = f"p{BAND_PERCENTILES[0]}", f"p{BAND_PERCENTILES[-1]}"
 
 # --- 6. VISUALISASI CHART (Future Projection) ---
 # Menggabungkan Data Aktual Terakhir & Prediksi untuk Grafik yang Mulus
@@ -170,6 +234,17 @@ plot_dates = list(df.index[-60:]) + future_dates
 plot_prices = list(df['Close'].iloc[-60:]) + future_prices
 
 fig = go.Figure()
+if bands:
+    # Pita persentil (bawah dulu, lalu atas diisi ke trace sebelumnya)
+    fig.add_trace(go.Scatter(
+        x=[df.index[-1]] + future_dates, y=[df['Close'].iloc[-1]] + bands[band_low],
+        mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[df.index[-1]] + future_dates, y=[df['Close'].iloc[-1]] + bands[band_high],
+        mode='lines', line=dict(width=0), fill='tonexty', fillcolor='rgba(255,75,75,0.2)',
+        name=f"P{BAND_PERCENTILES[0]}-P{BAND_PERCENTILES[-1]} ({BAND_LABELS.get(bands['method'], bands['method'])}, n={bands['samples']})"
+    ))
 # Garis Harga Asli (Biru Tua)
 fig.add_trace(go.Scatter(
     x=df.index[-60:], y=df['Close'].iloc[-60:],
@@ -193,14 +268,26 @@ fig.update_layout(
     showlegend=True,
     legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.8)')
 )
-st.plotly_chart(fig, use_container_width=True)
+# serialisasi Plotly -> browser terjadi di sini
+with span("prediction.render_chart"):
+    st.plotly_chart(fig, use_container_width=True)
+if bands and bands["method"] == "bootstrap":
+    st.caption("Band from input bootstrap: shows how sensitive the model is to small changes in its input window, "
+               "not model uncertainty. It is typically much narrower than an MC dropout band and is not a "
+               "calibrated confidence interval.")
 
 # --- 7. TABEL PREDIKSI ---
 st.markdown("### Predicted Prices (Next 7 Days)")
 
 # Membuat HTML Table agar sama persis dengan mockup
 table_html = '<table class="pred-table">'
-table_html += '<thead><tr><th>Date</th><th>Price</th><th>Change (%)</th></tr></thead><tbody>'
+band_headers = f"<th>P{BAND_PERCENTILES[0]}</th><th>P{BAND_PERCENTILES[-1]}</th>" if bands else ""
+# Error backtest per horizon (metrics.json "horizons"): hari ke-i dibandingkan dengan error hari ke-i
+horizon_mape = {h["day"]: h["MAPE"] for h in coin_metrics.get("horizons", [])}
+error_header = "<th>Backtest Error (MAPE)</th>" if horizon_mape else ""
+live_mape = {h["day"]: h["MAPE"] for h in live["horizons"]} if live else {}
+error_header += "<th>Live Error (MAPE)</th>" if live_mape else ""
+table_html += f'<thead><tr><th>Date</th><th>Price</th>{band_headers}<th>Change (%)</th>{error_header}</tr></thead><tbody>'
 
 for i in range(7):
     date_str = future_dates[i].strftime('%d %b %Y')
@@ -210,10 +297,19 @@ for i in range(7):
     color_class = "change-up" if change_val >= 0 else "change-down"
     sign = "+" if change_val >= 0 else ""
     
-    table_html += f"<tr><td>{date_str}</td><td>{price_str}</td><td class='{color_class}'>{sign}{change_val:.2f}%</td></tr>"
+    band_cells = f"<td>{format_price(bands[band_low][i])}</td><td>{format_price(bands[band_high][i])}</td>" if bands else ""
+    error_cell = (f"<td>±{horizon_mape[i + 1]:.2f}%</td>" if (i + 1) in horizon_mape else "<td>-</td>") if horizon_mape else ""
+    error_cell += (f"<td>±{live_mape[i + 1]:.2f}%</td>" if (i + 1) in live_mape else "<td>-</td>") if live_mape else ""
+    table_html += f"<tr><td>{date_str}</td><td>{price_str}</td>{band_cells}<td class='{color_class}'>{sign}{change_val:.2f}%</td>{error_cell}</tr>"
 
 table_html += '</tbody></table>'
-st.markdown(table_html, unsafe_allow_html=True)
+with span("prediction.render_table"):
+    st.markdown(table_html, unsafe_allow_html=True)
+if not horizon_mape:
+    # metrics.json dari UjiCobaModel.py versi lama hanya berisi error hari ke-1
+    st.caption(f"Per-horizon backtest error is not available for {selected_coin}: metrics.json was generated "
+               "before per-horizon evaluation, so the RMSE/MAPE above cover day 1 only. "
+               "Run UjiCobaModel.py to regenerate it.")
 
 # --- 8. FOOTER ---
 st.markdown("""
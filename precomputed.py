@@ -0,0 +1,101 @@
+import os
+import json
+import threading
+from datetime import datetime
+import pandas as pd
+from forecasting import forecast_to_dict, forecast_from_dict
+
+# Hasil forecast yang dihitung oleh job batch (BatchForecast.py).
+# Struktur:
+#   data/precomputed/<ticker>/<candle_terakhir>_<fingerprint>.json  -> satu hasil (immutable)
+#   data/precomputed/latest.json                                   -> manifest: ticker -> file terbaru
+# Setiap file ditulis atomik, jadi job yang terhenti di tengah aman dijalankan ulang.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRECOMPUTED_DIR = os.path.join(BASE_DIR, 'data', 'precomputed')
+MANIFEST_PATH = os.path.join(PRECOMPUTED_DIR, 'latest.json')
+
+SCHEMA_VERSION = 1
+
+# Hasil dengan candle terakhir lebih tua dari ini (jam, UTC) dianggap basi, mis. cron berhenti.
+# Candle hasil adalah candle close terakhir (buka kemarin 00:00 UTC), jadi hasil yang masih baru berumur
+# sampai 48 jam; sisanya toleransi untuk job yang terlambat
+MAX_AGE_HOURS = float(os.environ.get("PRECOMPUTED_MAX_AGE_HOURS", "60"))
+
+_manifest_lock = threading.Lock()
+
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def result_path(ticker, last_ts, fingerprint):
+    stamp = pd.Timestamp(last_ts).strftime('%Y%m%dT%H%M%S')
+    return os.path.join(PRECOMPUTED_DIR, ticker, f"{stamp}_{fingerprint[:16]}.json")
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"schema": SCHEMA_VERSION, "tickers": {}}
+
+
+def save_result(ticker, last_ts, fingerprint, forecast):
+    """Simpan satu hasil forecast lalu arahkan manifest ke file tersebut"""
+    path = result_path(ticker, last_ts, fingerprint)
+    _write_json({
+        "schema": SCHEMA_VERSION,
+        "ticker": ticker,
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "last_candle": pd.Timestamp(last_ts).isoformat(),
+        "model_fingerprint": fingerprint,
+        "forecast": forecast_to_dict(forecast),
+    }, path)
+    point_manifest(ticker, path)
+    return path
+
+
+def point_manifest(ticker, path):
+    """Arahkan manifest ticker ke file hasil tertentu (no-op jika sudah sama)"""
+    rel_path = os.path.relpath(path, PRECOMPUTED_DIR)
+    with _manifest_lock:
+        manifest = load_manifest()
+        if manifest.get("tickers", {}).get(ticker) == rel_path:
+            return
+        manifest["schema"] = SCHEMA_VERSION
+        manifest["updated_at"] = datetime.now().isoformat(timespec='seconds')
+        manifest.setdefault("tickers", {})[ticker] = rel_path
+        _write_json(manifest, MANIFEST_PATH)
+
+
+def load_latest(ticker):
+    """Hasil forecast terbaru untuk ticker (None jika job batch belum pernah jalan)"""
+    rel_path = load_manifest().get("tickers", {}).get(ticker)
+    if rel_path is None:
+        return None
+    try:
+        with open(os.path.join(PRECOMPUTED_DIR, rel_path), 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("schema") != SCHEMA_VERSION:
+        return None
+
+    data["last_candle"] = pd.Timestamp(data["last_candle"])
+    data["forecast"] = forecast_from_dict(data["forecast"])
+    return data
+
+
+def is_stale(result, newest_candle=None, max_age_hours=MAX_AGE_HOURS):
+    """True jika store lokal sudah punya candle close yang lebih baru, atau candle hasil lebih tua dari
+    max_age_hours"""
+    if newest_candle is not None and pd.Timestamp(newest_candle) > result["last_candle"]:
+        return True
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    return now - result["last_candle"] > pd.Timedelta(hours=max_age_hours)
@@ -0,0 +1,259 @@
+import os
+import time
+import threading
+import numpy as np
+from data_provider import get_provider
+from request_scheduler import DEFAULT_RATE
+from telemetry import span
+
+# Streaming harga live untuk Home: satu thread background per proses mem-poll sumber quote untuk
+# ticker yang sedang ditampilkan, lalu menyimpan tiap tick di ring buffer per ticker. Halaman cukup
+# membaca buffer (tanpa jaringan) dari fragment yang di-rerun berkala, bukan menjalankan ulang seluruh script.
+#
+# Sumber quote bisa diganti:
+#   PRICE_STREAM_SOURCE=provider   -> close candle harian berjalan dari DATA_PROVIDER (default untuk yfinance)
+#   PRICE_STREAM_SOURCE=simulated  -> random walk lokal dari close terakhir di store (default untuk replay)
+#   PRICE_STREAM_INTERVAL=5 PRICE_STREAM_SOURCE=simulated streamlit run Home.py
+
+POLL_INTERVAL = float(os.environ.get("PRICE_STREAM_INTERVAL", "5"))
+# Jumlah tick per ticker yang disimpan (720 x 5 detik = 1 jam)
+CAPACITY = int(os.environ.get("PRICE_STREAM_CAPACITY", "720"))
+# Ticker yang tidak diminta halaman mana pun selama ini (detik) berhenti di-poll
+WATCH_TTL = 300
+# Jumlah ticker per putaran untuk sumber provider (satu request per ticker). Default: separuh token
+# scheduler per interval, sisanya untuk refresh candle & halaman lain. Ticker aktif yang lebih banyak
+# dari batas ini di-poll bergiliran (round-robin), jadi tiap ticker tetap kebagian tick.
+PROVIDER_MAX_TICKERS = int(os.environ.get("PRICE_STREAM_MAX_TICKERS", "0")) or max(1, int(DEFAULT_RATE * POLL_INTERVAL / 2))
+
+
+class RingBuffer:
+    """Buffer (timestamp, harga) berukuran tetap; tick lama ditimpa, append O(1)"""
+
+    def __init__(self, capacity=CAPACITY):
+        self.ts = np.zeros(capacity, dtype='float64')
+        self.price = np.zeros(capacity, dtype='float64')
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def append(self, ts, price):
+        with self._lock:
+            i = self.count % len(self.ts)
+            self.ts[i], self.price[i] = ts, price
+            self.count += 1
+
+    def latest(self):
+        """(timestamp, harga) tick terakhir, None jika masih kosong"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            i = (self.count - 1) % len(self.ts)
+            return float(self.ts[i]), float(self.price[i])
+
+    def values(self):
+        """Salinan (timestamps, harga) urut dari yang paling lama"""
+        with self._lock:
+            n = min(self.count, len(self.ts))
+            start = self.count % len(self.ts) if self.count > len(self.ts) else 0
+            order = (np.arange(n) + start) % len(self.ts)
+            return self.ts[order], self.price[order]
+
+
+class QuoteSource:
+    """Antarmuka sumber quote: harga terkini untuk sekumpulan ticker"""
+
+    name = "base"
+    # Batas ticker per putaran (None = semua ticker aktif sekaligus)
+    max_tickers = None
+
+    def quotes(self, tickers):
+        """dict ticker -> harga terakhir (ticker yang gagal boleh tidak ada)"""
+        raise NotImplementedError
+
+
+class ProviderQuoteSource(QuoteSource):
+    """Close candle harian berjalan lewat provider aktif: satu request kecil (1 baris) per ticker lewat
+    scheduler, maksimal max_tickers ticker per putaran"""
+
+    name = "provider"
+
+    def __init__(self, max_tickers=PROVIDER_MAX_TICKERS):
+        self.max_tickers = max_tickers
+
+    def quotes(self, tickers):
+        frames = get_provider().history_many(list(tickers), period="1d", interval="1d")
+        quotes = {}
+        for ticker, df in frames.items():
+            closes = df['Close'].dropna() if df is not None and not df.empty else None
+            if closes is not None and not closes.empty:
+                quotes[ticker] = float(closes.iloc[-1])
+        return quotes
+
+
+class SimulatedQuoteSource(QuoteSource):
+    """Random walk lokal (untuk demo & pengujian tanpa jaringan), dimulai dari close terakhir di store"""
+
+    name = "simulated"
+
+    def __init__(self, volatility=0.001, seed=0, start_price=None):
+        self.volatility = volatility
+        self.start_price = start_price or self._last_close
+        self._rng = np.random.default_rng(seed)
+        self._prices = {}
+
+    @staticmethod
+    def _last_close(ticker):
+        from candle_store import load_candles
+        hist = load_candles(ticker, "1d")
+        return float(hist['Close'].iloc[-1]) if not hist.empty else 100.0
+
+    def quotes(self, tickers):
+        for ticker in tickers:
+            if ticker not in self._prices:
+                self._prices[ticker] = self.start_price(ticker)
+            self._prices[ticker] *= float(np.exp(self._rng.normal(0, self.volatility)))
+        return {ticker: self._prices[ticker] for ticker in tickers}
+
+
+class PriceStream:
+    def __init__(self, source, interval=POLL_INTERVAL, capacity=CAPACITY):
+        self.source = source
+        self.interval = interval
+        self.capacity = capacity
+        self._buffers = {}
+        self._watched = {}  # ticker -> waktu terakhir diminta halaman
+        self._cursor = 0  # posisi round-robin jika ticker aktif melebihi source.max_tickers
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def watch(self, tickers):
+        """Tandai ticker sebagai sedang ditampilkan (dipanggil setiap kali fragment dirender)"""
+        now = time.time()
+        with self._lock:
+            new = [ticker for ticker in tickers if ticker not in self._watched]
+            for ticker in tickers:
+                self._watched[ticker] = now
+        if new:
+            # ticker baru langsung di-poll, tidak menunggu putaran berikutnya
+            self._wake.set()
+
+    def _active(self):
+        cutoff = time.time() - WATCH_TTL
+        with self._lock:
+            self._watched = {t: seen for t, seen in self._watched.items() if seen >= cutoff}
+            return list(self._watched)
+
+    def buffer(self, ticker):
+        with self._lock:
+            if ticker not in self._buffers:
+                self._buffers[ticker] = RingBuffer(self.capacity)
+            return self._buffers[ticker]
+
+    def _next_batch(self, tickers):
+        """Ticker untuk putaran ini: semua, atau potongan berikutnya secara bergiliran"""
+        limit = self.source.max_tickers
+        if not limit or len(tickers) <= limit:
+            return tickers
+        start = self._cursor % len(tickers)
+        self._cursor = start + limit
+        return (tickers[start:] + tickers[:start])[:limit]
+
+    def poll_once(self):
+        """Satu putaran: ambil quote ticker aktif lalu masukkan ke buffer. Kembalikan jumlah tick"""
+        tickers = self._next_batch(self._active())
+        if not tickers:
+            return 0
+        with span("stream.poll"):
+            quotes = self.source.quotes(tickers)
+        now = time.time()
+        for ticker, price in quotes.items():
+            self.buffer(ticker).append(now, price)
+        return len(quotes)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                self.poll_once()
+            except Exception as e:
+                # gagal sementara (jaringan, rate limit) -> coba lagi di putaran berikutnya
+                print(f"Price stream ({self.source.name}) gagal: {e}")
+            self._wake.wait(max(0.0, self.interval - (time.time() - started)))
+            self._wake.clear()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="price-stream", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def latest(self, ticker):
+        with self._lock:
+            buffer = self._buffers.get(ticker)
+        return buffer.latest() if buffer is not None else None
+
+    def latest_prices(self, tickers):
+        """dict ticker -> harga tick terakhir (hanya ticker yang sudah punya tick)"""
+        prices = {}
+        for ticker in tickers:
+            tick = self.latest(ticker)
+            if tick is not None:
+                prices[ticker] = tick[1]
+        return prices
+
+
+def overlay_prices(rows, prices):
+    """Salinan baris ringkasan pasar dengan harga live; change 24h & market cap ikut disesuaikan"""
+    updated = []
+    for row in rows:
+        live = prices.get(row["Ticker"])
+        if live is None or not row["Price"]:
+            updated.append(row)
+            continue
+        prev_close = row["Price"] / (1 + row["Change"] / 100)
+        updated.append(dict(row,
+                            Price=live,
+                            Change=(live - prev_close) / prev_close * 100 if prev_close > 0 else row["Change"],
+                            MarketCap=row["MarketCap"] * live / row["Price"]))
+    return updated
+
+
+def source_from_env():
+    default = "simulated" if get_provider().name == "replay" else "provider"
+    name = os.environ.get("PRICE_STREAM_SOURCE", default).lower()
+    if name == "provider":
+        return ProviderQuoteSource()
+    if name == "simulated":
+        return SimulatedQuoteSource()
+    raise ValueError(f"PRICE_STREAM_SOURCE tidak dikenal: {name}")
+
+
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def get_stream():
+    """Stream bersama (satu thread poll per proses), dibuat & dijalankan saat pertama dipakai"""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = PriceStream(source_from_env()).start()
+        return _stream
+
+
+def set_stream(stream):
+    """Ganti stream aktif (misalnya sumber simulasi di pengujian); stream lama dihentikan"""
+    global _stream
+    with _stream_lock:
+        if _stream is not None and _stream is not stream:
+            _stream.stop()
+        _stream = stream
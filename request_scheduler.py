@@ -0,0 +1,167 @@
+import os
+import re
+import time
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from telemetry import span
+
+# Penjadwal request bersama untuk semua akses jaringan ke penyedia data (Yahoo Finance):
+# - token bucket: rata-rata FETCH_RATE request/detik dengan burst FETCH_BURST, dipakai semua thread
+# - retry dengan exponential backoff + jitter untuk error sementara (rate limit, koneksi, timeout)
+# - request identik yang sedang berjalan digabung: pemanggil kedua menunggu hasil yang pertama
+#
+#   FETCH_RATE=2 FETCH_BURST=5 FETCH_MAX_RETRIES=4 streamlit run Home.py
+
+DEFAULT_RATE = float(os.environ.get("FETCH_RATE", "2"))
+DEFAULT_BURST = int(os.environ.get("FETCH_BURST", "5"))
+DEFAULT_MAX_RETRIES = int(os.environ.get("FETCH_MAX_RETRIES", "4"))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# Refresh banyak ticker: satu request per ticker di pool terbatas, ticker yang lambat ditinggal
+FETCH_WORKERS = int(os.environ.get("FETCH_WORKERS", "8"))
+TICKER_TIMEOUT = float(os.environ.get("TICKER_TIMEOUT", "8"))
+
+
+class TokenBucket:
+    """Token bucket thread-safe: acquire() menunggu sampai ada token"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self, seconds):
+        """Kosongkan bucket sehingga request berikutnya tertahan ~seconds (setelah kena rate limit)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+def is_rate_limited(exc):
+    text = f"{type(exc).__name__} {exc}"
+    return "RateLimit" in text or "Too Many Requests" in text or re.search(r"\b429\b", text) is not None
+
+
+def is_transient(exc):
+    """Error yang layak di-retry: rate limit, koneksi putus, timeout"""
+    if is_rate_limited(exc):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    name = type(exc).__name__
+    return any(word in name for word in ("Timeout", "Connection", "HTTPError"))
+
+
+class RequestScheduler:
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt):
+        """Full jitter: acak di [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _run(self, fn):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return fn()
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+                delay = self.backoff(attempt)
+                if is_rate_limited(e):
+                    # tahan semua thread, bukan hanya request ini
+                    self.bucket.drain(delay)
+                print(f"Request gagal ({type(e).__name__}: {e}), coba lagi dalam {delay:.1f} detik")
+                with span("fetch.backoff"):
+                    time.sleep(delay)
+
+    def call(self, key, fn):
+        """Jalankan fn() lewat rate limit & retry; pemanggil dengan key yang sama menunggu hasil yang sedang berjalan"""
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            result = future.result()
+            # salinan agar pemanggil tidak saling mengubah DataFrame/dict yang sama
+            return result.copy() if hasattr(result, 'copy') else result
+
+        try:
+            future.set_result(self._run(fn))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+
+def run_bounded(fn, items, workers=FETCH_WORKERS, timeout=TICKER_TIMEOUT, cancel_pending=True):
+    """fn(item) untuk setiap item di pool thread terbatas, menunggu paling lama timeout detik.
+    Kembalikan (dict item -> hasil, dict item -> exception, list item yang belum selesai).
+    Yang sedang berjalan tetap diselesaikan di background; yang masih antri dibatalkan, atau ikut
+    dijalankan di background jika cancel_pending=False (hasilnya tidak dikembalikan)."""
+    items = list(items)
+    if not items:
+        return {}, {}, []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, len(items))))
+    futures = {item: executor.submit(fn, item) for item in items}
+    wait(futures.values(), timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=cancel_pending)
+
+    results, errors, pending = {}, {}, []
+    for item, future in futures.items():
+        if not future.done() or future.cancelled():
+            # belum selesai (antri / menunggu token rate limit) bukan berarti gagal
+            pending.append(item)
+        elif future.exception() is not None:
+            errors[item] = future.exception()
+        else:
+            results[item] = future.result()
+    return results, errors, pending
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Penjadwal bersama (satu per proses)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler):
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
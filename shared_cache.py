@@ -0,0 +1,170 @@
+import os
+import time
+import uuid
+import pickle
+import sqlite3
+import hashlib
+import threading
+from functools import wraps
+from telemetry import span
+
+# Cache hasil fungsi yang dipakai bersama oleh semua replika Streamlit di satu host (SQLite lokal),
+# pengganti st.cache_data yang per proses. Setiap key punya TTL; saat kadaluarsa hanya SATU
+# proses/thread yang menghitung ulang (single-flight), yang lain memakai nilai lama atau menunggu.
+# Ukuran total dibatasi, entry yang paling lama tidak dipakai dihapus duluan.
+#
+#   SHARED_CACHE_PATH=/var/tmp/crypto_cache.sqlite streamlit run Home.py
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.environ.get("SHARED_CACHE_PATH", os.path.join(BASE_DIR, 'data', 'cache', 'shared_cache.sqlite'))
+
+# Batas ukuran total nilai (byte, hasil pickle)
+MAX_BYTES = int(os.environ.get("SHARED_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Lock refresh dianggap mati (proses crash) setelah sekian detik
+LOCK_TIMEOUT = 60
+# Interval polling saat menunggu proses lain selesai menghitung
+POLL_INTERVAL = 0.1
+# Waktu "terakhir dipakai" untuk LRU cukup diperbarui sekali per rentang ini
+TOUCH_INTERVAL = 30
+
+_local = threading.local()
+
+
+def _connect():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != CACHE_PATH:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(CACHE_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY, name TEXT NOT NULL, value BLOB NOT NULL, size INTEGER NOT NULL,
+            expires REAL NOT NULL, accessed REAL NOT NULL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS locks (
+            key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)""")
+        _local.conn, _local.path = conn, CACHE_PATH
+    return conn
+
+
+def make_key(name, args, kwargs):
+    raw = pickle.dumps((name, args, sorted(kwargs.items())), protocol=4)
+    return hashlib.sha256(raw).hexdigest()
+
+
+def get(key):
+    """(nilai, masih_segar) atau (None, False) jika tidak ada"""
+    conn = _connect()
+    row = conn.execute("SELECT value, expires, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return None, False
+    value, expires, accessed = row
+    now = time.time()
+    if now - accessed > TOUCH_INTERVAL:
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+    return pickle.loads(value), now < expires
+
+
+def put(key, value, ttl, name=""):
+    blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    now = time.time()
+    conn = _connect()
+    conn.execute("INSERT OR REPLACE INTO entries (key, name, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                 (key, name, blob, len(blob), now + ttl, now))
+    _evict(conn)
+
+
+def clear(name=None):
+    """Hapus semua entry (atau hanya milik satu fungsi)"""
+    if name is None:
+        _connect().execute("DELETE FROM entries")
+    else:
+        _connect().execute("DELETE FROM entries WHERE name = ?", (name,))
+
+
+def _evict(conn):
+    """Hapus entry LRU sampai total ukuran <= MAX_BYTES"""
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            if total <= MAX_BYTES:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _acquire(key, owner):
+    """Coba ambil lock refresh untuk key (atomik antar proses)"""
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT expires FROM locks WHERE key = ?", (key,)).fetchone()
+        acquired = row is None or row[0] < now
+        if acquired:
+            conn.execute("INSERT OR REPLACE INTO locks (key, owner, expires) VALUES (?, ?, ?)",
+                         (key, owner, now + LOCK_TIMEOUT))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return acquired
+
+
+def _release(key, owner):
+    _connect().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+
+def get_or_compute(key, compute_fn, ttl, name=""):
+    """Nilai segar dari cache, atau hitung dengan compute_fn() (hanya satu pemanggil per key)"""
+    value, fresh = get(key)
+    if fresh:
+        return value
+
+    owner = f"{os.getpid()}-{threading.get_ident()}-{uuid.uuid4().hex[:8]}"
+    while True:
+        if _acquire(key, owner):
+            try:
+                # proses lain mungkin baru saja selesai sebelum lock didapat
+                value, fresh = get(key)
+                if fresh:
+                    return value
+                with span("cache.compute"):
+                    value = compute_fn()
+                put(key, value, ttl, name)
+                return value
+            finally:
+                _release(key, owner)
+
+        # Proses lain sedang menghitung: pakai nilai lama jika ada (stale-while-revalidate),
+        # selain itu tunggu hasilnya (lock yang macet kadaluarsa setelah LOCK_TIMEOUT)
+        if value is not None:
+            return value
+        with span("cache.wait"):
+            time.sleep(POLL_INTERVAL)
+        value, fresh = get(key)
+        if fresh:
+            return value
+
+
+def cached(ttl, name=None):
+    """Decorator pengganti @st.cache_data(ttl=...) dengan cache bersama antar proses.
+    Argumen fungsi harus bisa di-pickle; setiap pemanggil menerima salinan nilainya sendiri."""
+    def decorator(fn):
+        cache_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = make_key(cache_name, args, kwargs)
+            return get_or_compute(key, lambda: fn(*args, **kwargs), ttl, cache_name)
+
+        wrapper.clear = lambda: clear(cache_name)
+        return wrapper
+    return decorator
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from candle_store import OHLCV_COLS
+
+# Generator OHLCV sintetis (geometric Brownian motion) untuk benchmark & pengujian offline.
+# Deterministik per (ticker, seed), jadi hasil benchmark bisa dibandingkan antar commit.
+
+
+def _ticker_seed(ticker, seed):
+    return (sum(ord(c) * (i + 1) for i, c in enumerate(ticker)) + seed * 7919) % (2 ** 32)
+
+
+def generate_ohlcv(ticker="SYN-USD", start="2018-01-01", periods=None, years=3, freq="D",
+                   start_price=100.0, daily_vol=0.04, seed=0):
+    """DataFrame OHLCV sintetis dengan format yang sama seperti store candle"""
+    probe = pd.date_range(start=start, periods=2, freq=freq)
+    step = probe[1] - probe[0]
+    if periods is None:
+        periods = int(years * pd.Timedelta(days=365) / step)
+
+    rng = np.random.default_rng(_ticker_seed(ticker, seed))
+    step_vol = daily_vol * np.sqrt(step / pd.Timedelta(days=1))
+
+    log_ret = rng.normal(0, step_vol, periods)
+    close = start_price * np.exp(np.cumsum(log_ret))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    wick = np.abs(rng.normal(0, step_vol / 2, (2, periods)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    volume = rng.lognormal(mean=20, sigma=0.5, size=periods)
+
+    index = pd.date_range(start=start, periods=periods, freq=freq, name='Date')
+    return pd.DataFrame(np.column_stack([open_, high, low, close, volume]), index=index, columns=OHLCV_COLS)
+
+
+def generate_universe(n_tickers=5, years=3, freq="D", seed=0):
+    """dict ticker -> DataFrame OHLCV sintetis untuk n ticker"""
+    return {
+        f"SYN{i:03d}-USD": generate_ohlcv(f"SYN{i:03d}-USD", years=years, freq=freq,
+                                          start_price=10 ** np.random.default_rng(seed + i).uniform(-6, 5), seed=seed)
+        for i in range(n_tickers)
+    }
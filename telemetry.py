@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import math
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# Instrumentasi latency per tahap (fetch, features, inferensi, render) yang cukup murah untuk
+# dibiarkan aktif di production: setiap span hanya dua perf_counter() dan satu increment bucket.
+# Durasi disimpan dalam histogram bucket logaritmik, dari situ dihitung p50/p95/p99.
+#
+# Export (otomatis setiap TELEMETRY_EXPORT_INTERVAL detik, per proses; file ditimpa, tidak terus membesar):
+#   data/telemetry/stages_<pid>.jsonl  -> snapshot terakhir, satu baris JSON per tahap
+#   data/telemetry/stages_<pid>.prom   -> format teks Prometheus (node_exporter textfile collector)
+# File milik proses yang sudah berhenti (tidak diperbarui STALE_EXPORTS x interval) dihapus saat export.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", os.path.join(BASE_DIR, 'data', 'telemetry'))
+ENABLED = os.environ.get("TELEMETRY_ENABLED", "1") != "0"
+EXPORT_INTERVAL = float(os.environ.get("TELEMETRY_EXPORT_INTERVAL", "60"))
+STALE_EXPORTS = 10
+
+# Bucket: 10 mikrodetik s.d. ~10 menit, rasio 1.25 antar bucket (error persentil maks ~25%, umumnya jauh lebih kecil)
+BUCKET_MIN = 1e-5
+BUCKET_RATIO = 1.25
+BUCKET_COUNT = 81
+BUCKET_BOUNDS = [BUCKET_MIN * BUCKET_RATIO ** i for i in range(BUCKET_COUNT)]
+_LOG_RATIO = math.log(BUCKET_RATIO)
+
+
+class Histogram:
+    """Histogram durasi (detik) dengan bucket tetap"""
+
+    def __init__(self):
+        self.counts = [0] * (BUCKET_COUNT + 1)  # bucket terakhir = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        if seconds <= BUCKET_MIN:
+            index = 0
+        else:
+            index = min(int(math.ceil(math.log(seconds / BUCKET_MIN) / _LOG_RATIO)), BUCKET_COUNT)
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Perkiraan persentil: interpolasi geometris di dalam bucket, dibatasi nilai maksimum"""
+        if self.count == 0:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, n in enumerate(self.counts):
+            if n and cumulative + n >= target:
+                if index == 0:
+                    return min(BUCKET_MIN, self.max)
+                if index == BUCKET_COUNT:
+                    return self.max
+                lower = BUCKET_BOUNDS[index - 1]
+                fraction = (target - cumulative) / n
+                return min(lower * BUCKET_RATIO ** fraction, self.max)
+            cumulative += n
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_ms": self.total * 1000,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+_histograms = {}
+_lock = threading.Lock()
+_exporter = None
+
+
+def record(name, seconds):
+    """Catat satu durasi untuk tahap `name`"""
+    if not ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+    _ensure_exporter()
+
+
+@contextmanager
+def span(name):
+    """with span("prediction.predict"): ...  -> durasi blok dicatat ke histogram tahap tsb"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator versi span() untuk satu fungsi"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def snapshot():
+    """Ringkasan semua tahap: count, sum, p50/p95/p99, max (ms)"""
+    with _lock:
+        return {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+
+
+def dump_state():
+    """Isi mentah semua histogram (bisa di-pickle), untuk digabung dari proses worker"""
+    with _lock:
+        return {name: (list(h.counts), h.count, h.total, h.max) for name, h in _histograms.items()}
+
+
+def merge_state(state):
+    """Tambahkan histogram hasil dump_state() proses lain ke proses ini"""
+    with _lock:
+        for name, (counts, count, total, maximum) in state.items():
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+            histogram.count += count
+            histogram.total += total
+            histogram.max = max(histogram.max, maximum)
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def export_jsonl(path, append=True):
+    """Snapshot ke file JSON lines (satu baris per tahap): ditambahkan, atau menimpa file secara atomik"""
+    now = time.time()
+    lines = [json.dumps(dict(stage=name, ts=now, pid=os.getpid(), **stats)) for name, stats in snapshot().items()]
+    if not lines:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if append:
+        with open(path, 'a') as f:
+            f.write("\n".join(lines) + "\n")
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def prometheus_text():
+    """Histogram semua tahap dalam format teks Prometheus"""
+    out = [
+        "# HELP crypto_stage_duration_seconds Durasi per tahap (fetch, features, inferensi, render)",
+        "# TYPE crypto_stage_duration_seconds histogram",
+    ]
+    with _lock:
+        for name, histogram in sorted(_histograms.items()):
+            cumulative = 0
+            for index, n in enumerate(histogram.counts):
+                cumulative += n
+                le = f"{BUCKET_BOUNDS[index]:.6g}" if index < BUCKET_COUNT else "+Inf"
+                if n or le == "+Inf":
+                    out.append(f'crypto_stage_duration_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            out.append(f'crypto_stage_duration_seconds_sum{{stage="{name}"}} {histogram.total:.9f}')
+            out.append(f'crypto_stage_duration_seconds_count{{stage="{name}"}} {histogram.count}')
+    return "\n".join(out) + "\n"
+
+
+def export_prometheus(path):
+    """Tulis file teks Prometheus secara atomik"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _prune_stale(directory, max_age):
+    """Hapus file export proses lain yang sudah lama tidak diperbarui (proses berhenti / restart)"""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.name.startswith("stages_") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def export_all(directory=None):
+    directory = directory or TELEMETRY_DIR
+    base = os.path.join(directory, f"stages_{os.getpid()}")
+    export_jsonl(base + ".jsonl", append=False)
+    export_prometheus(base + ".prom")
+    if EXPORT_INTERVAL > 0:
+        _prune_stale(directory, STALE_EXPORTS * EXPORT_INTERVAL)
+
+
+def _export_loop():
+    while True:
+        time.sleep(EXPORT_INTERVAL)
+        try:
+            export_all()
+        except OSError as e:
+            print(f"Gagal export telemetry: {e}")
+
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is not None or EXPORT_INTERVAL <= 0:
+        return
+    with _lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="telemetry-exporter", daemon=True)
+            _exporter.start()
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+from backtest import walk_forward_paths, walk_forward_predict, horizon_metrics
+from features import FEATURES, LOOKBACK, compute_features
+from forecasting import HORIZON
+from synthetic_data import generate_ohlcv
+
+
+class LinearModel:
+    """Model deterministik: output tiap window hanya bergantung pada window itu sendiri"""
+
+    def __init__(self, n_features):
+        rng = np.random.default_rng(1)
+        self.weights = rng.normal(0, 0.01, size=(n_features, HORIZON))
+
+    def predict(self, X, verbose=0):
+        return 0.5 + np.asarray(X).mean(axis=1) @ self.weights
+
+
+@pytest.fixture
+def setup():
+    df_full = compute_features(generate_ohlcv("TEST-USD", start="2023-01-01", periods=300))
+    scaler = MinMaxScaler().fit(df_full[FEATURES].values)
+    return LinearModel(len(FEATURES)), scaler, df_full
+
+
+def per_day_loop(model, scaler, df_full, test_start, test_end):
+    """Loop harian lama dari UjiCobaModel.py: satu model.predict per tanggal uji (horizon 1)"""
+    test_dates = df_full.loc[(df_full.index >= test_start) & (df_full.index <= test_end)].index
+    dates, actual, predicted = [], [], []
+    for date in test_dates:
+        idx = df_full.index.get_loc(date)
+        if idx < LOOKBACK:
+            continue
+        input_window = df_full.iloc[idx - LOOKBACK:idx]
+        input_scaled = scaler.transform(input_window[FEATURES].values)
+        pred_log_ret_scaled = model.predict(np.expand_dims(input_scaled, axis=0), verbose=0)[0][0]
+        pred_log_ret = (pred_log_ret_scaled - scaler.min_[0]) / scaler.scale_[0]
+        dates.append(date)
+        actual.append(df_full.loc[date, 'Close'])
+        predicted.append(input_window['Close'].iloc[-1] * np.exp(pred_log_ret))
+    return dates, np.array(actual), np.array(predicted)
+
+
+def test_batched_backtest_matches_per_day_loop(setup):
+    model, scaler, df_full = setup
+    # tanggal awal sebelum LOOKBACK ikut diuji: harus dilewati oleh kedua versi
+    test_start, test_end = df_full.index[LOOKBACK - 5], df_full.index[-1]
+
+    dates, actual, predicted = per_day_loop(model, scaler, df_full, test_start, test_end)
+    result = walk_forward_predict(model, scaler, df_full, test_start, test_end)
+
+    assert list(result.index) == dates
+    np.testing.assert_allclose(result['Actual'].values, actual)
+    np.testing.assert_allclose(result['Predicted'].values, predicted, rtol=1e-10)
+
+
+def test_paths_compound_each_horizon_from_last_close(setup):
+    model, scaler, df_full = setup
+    test_start, test_end = df_full.index[-20], df_full.index[-1]
+    dates, predicted, actual = walk_forward_paths(model, scaler, df_full, test_start, test_end)
+
+    close = df_full['Close'].values
+    for row, date in enumerate(dates):
+        idx = df_full.index.get_loc(date)
+        window = scaler.transform(df_full[FEATURES].values[idx - LOOKBACK:idx])
+        log_ret = (model.predict(window[np.newaxis])[0] - scaler.min_[0]) / scaler.scale_[0]
+        np.testing.assert_allclose(predicted[row], close[idx - 1] * np.exp(np.cumsum(log_ret)), rtol=1e-10)
+        for day in range(HORIZON):
+            target = idx + day
+            if target < len(close):
+                assert actual[row, day] == close[target]
+            else:
+                assert np.isnan(actual[row, day])
+
+
+def test_horizon_metrics_per_day_and_skips_missing_actuals():
+    predicted = np.array([[110.0, 120.0, 130.0],
+                          [90.0, 100.0, 100.0]])
+    actual = np.array([[100.0, 100.0, np.nan],
+                       [100.0, 100.0, np.nan]])
+
+    metrics = horizon_metrics(predicted, actual)
+
+    # hari ke-3 tidak punya close aktual sama sekali -> tidak dilaporkan
+    assert [m["day"] for m in metrics] == [1, 2]
+    day1, day2 = metrics
+    assert day1 == {"day": 1, "RMSE": 10.0, "MAE": 10.0, "MAPE": 10.0, "n": 2}
+    assert day2["RMSE"] == pytest.approx(np.sqrt(200.0))
+    assert day2["MAE"] == 10.0
+    assert day2["MAPE"] == 10.0
+    assert day2["n"] == 2
+
+
+def test_horizon_metrics_match_walk_forward_day_one(setup):
+    model, scaler, df_full = setup
+    dates, predicted, actual = walk_forward_paths(model, scaler, df_full, df_full.index[-60], df_full.index[-1])
+    day1 = horizon_metrics(predicted, actual)[0]
+
+    error = predicted[:, 0] - actual[:, 0]
+    assert day1["n"] == len(dates)
+    assert day1["RMSE"] == pytest.approx(np.sqrt(np.mean(error ** 2)), abs=1e-8)
+    assert day1["MAPE"] == pytest.approx(np.mean(np.abs(error) / actual[:, 0]) * 100, abs=0.01)
+    # horizon yang lebih jauh punya lebih sedikit tanggal uji dengan close aktual
+    counts = [m["n"] for m in horizon_metrics(predicted, actual)]
+    assert counts == sorted(counts, reverse=True)
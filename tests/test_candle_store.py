@@ -0,0 +1,61 @@
+import os
+import threading
+import pytest
+import candle_store
+from synthetic_data import generate_ohlcv
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_queued_refreshes_are_pending_not_failed(store, monkeypatch):
+    candles = generate_ohlcv("TEST-USD", start="2024-01-01", periods=50)
+    release = threading.Event()
+
+    class SlowProvider:
+        name = "slow"
+
+        def history(self, ticker, start=None, end=None, period=None, interval="1d"):
+            # satu worker tertahan -> ticker lain masih antri saat timeout habis
+            release.wait(5)
+            return candles
+
+    monkeypatch.setattr(candle_store, "get_provider", lambda: SlowProvider())
+    monkeypatch.setattr(candle_store, "run_bounded", _single_worker(timeout=0.2))
+    tickers = ["A-USD", "B-USD", "C-USD"]
+
+    result, failed = candle_store.update_candles_many(tickers)
+    assert failed == set()
+    assert all(result[t].empty for t in tickers)
+    # panggilan berikutnya tidak menumpuk refresh untuk ticker yang masih berjalan di background
+    assert candle_store.update_candles_many(tickers)[1] == set()
+
+    release.set()
+    for _ in range(50):
+        if not candle_store._refreshing:
+            break
+        threading.Event().wait(0.1)
+    result, failed = candle_store.update_candles_many(tickers)
+    assert failed == set()
+    assert all(len(result[t]) == len(candles) for t in tickers)
+
+
+def test_refresh_order_puts_empty_then_oldest_store_first(store):
+    candles = generate_ohlcv("TEST-USD", start="2024-01-01", periods=10)
+    for ticker, mtime in [("OLD-USD", 1000), ("NEW-USD", 2000)]:
+        candle_store.write_frame(candles, candle_store.store_path(ticker, "1d"))
+        os.utime(candle_store.store_path(ticker, "1d"), (mtime, mtime))
+    tickers = ["NEW-USD", "OLD-USD", "EMPTY-USD"]
+    stored = {t: candle_store.load_candles(t, "1d") for t in tickers}
+    assert candle_store._refresh_order(tickers, "1d", stored) == ["EMPTY-USD", "OLD-USD", "NEW-USD"]
+
+
+def _single_worker(timeout):
+    from request_scheduler import run_bounded
+
+    def bounded(fn, items, cancel_pending=True):
+        return run_bounded(fn, items, workers=1, timeout=timeout, cancel_pending=cancel_pending)
+    return bounded
@@ -0,0 +1,55 @@
+import threading
+import pandas as pd
+import pytest
+import candle_store
+import features
+from synthetic_data import generate_ohlcv
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_store, "STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_checkpoint_from_racing_writer_is_rebuilt_without_duplicates(store):
+    candles = generate_ohlcv("TEST-USD", start="2024-01-01", periods=200)
+    features.update_features("TEST-USD", candles=candles.iloc[:150])
+    old_state = open(features.state_path("TEST-USD")).read()
+
+    # proses lain menulis checkpoint baru; pembaca ini masih melihat state yang lama
+    features.update_features("TEST-USD", candles=candles.iloc[:160])
+    with open(features.state_path("TEST-USD"), "w") as f:
+        f.write(old_state)
+
+    result = features.update_features("TEST-USD", candles=candles)
+    assert result.index.is_unique
+    checkpoint = pd.read_parquet(features.feature_path("TEST-USD"))
+    assert checkpoint.index.is_unique
+
+    expected = features.update_features("FRESH-USD", candles=candles)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_concurrent_updates_on_new_candle_do_not_fail(store):
+    candles = generate_ohlcv("TEST-USD", start="2024-01-01", periods=200)
+    features.update_features("TEST-USD", candles=candles.iloc[:150])
+
+    errors = []
+
+    def worker(end):
+        try:
+            for _ in range(20):
+                features.update_features("TEST-USD", candles=candles.iloc[:end])
+        except Exception as e:
+            errors.append(e)
+
+    # beberapa sesi memperbarui ticker yang sama saat candle baru masuk
+    threads = [threading.Thread(target=worker, args=(151 + i % 2,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert pd.read_parquet(features.feature_path("TEST-USD")).index.is_unique
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+import inference_server
+from artifacts import ArrayScaler
+from features import FEATURES, LOOKBACK
+from forecasting import HORIZON
+
+
+class ZeroModel:
+    def predict(self, X, verbose=0):
+        return np.zeros((len(X), HORIZON))
+
+
+class FakeRegistry:
+    def get(self, ticker, prefer_lite=True):
+        n = len(FEATURES)
+        return ZeroModel(), ArrayScaler(np.zeros(n), np.ones(n), np.zeros(n), np.ones(n))
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    monkeypatch.setattr(inference_server, "get_registry", lambda: FakeRegistry())
+    return inference_server.MicroBatcher("TEST-USD")
+
+
+def test_submit_rejects_wrong_window_shape(batcher):
+    with pytest.raises(ValueError):
+        batcher.submit(np.zeros((LOOKBACK - 1, len(FEATURES))))
+    result = batcher.submit(np.zeros((LOOKBACK, len(FEATURES)))).result(timeout=5)
+    assert len(result) == HORIZON
+
+
+def test_mixed_shapes_in_one_batch_do_not_kill_batcher(batcher, monkeypatch):
+    # lewati validasi submit(): window beda bentuk masuk ke batch yang sama
+    monkeypatch.setattr(inference_server, "BATCH_WINDOW", 0.2)
+    futures = []
+    for shape in [(LOOKBACK, len(FEATURES)), (LOOKBACK - 1, len(FEATURES))]:
+        future = inference_server.Future()
+        batcher.requests.put((np.zeros(shape), future))
+        futures.append(future)
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+    assert batcher.thread.is_alive()
+    result = batcher.submit(np.zeros((LOOKBACK, len(FEATURES)))).result(timeout=5)
+    assert len(result) == HORIZON
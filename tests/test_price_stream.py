@@ -0,0 +1,26 @@
+from price_stream import PriceStream, QuoteSource
+
+
+class CountingSource(QuoteSource):
+    name = "counting"
+    max_tickers = 3
+
+    def __init__(self):
+        self.requested = []
+
+    def quotes(self, tickers):
+        self.requested.append(list(tickers))
+        return {ticker: 1.0 for ticker in tickers}
+
+
+def test_poll_is_capped_and_round_robins_over_active_tickers():
+    source = CountingSource()
+    stream = PriceStream(source)
+    tickers = [f"T{i}-USD" for i in range(8)]
+    stream.watch(tickers)
+
+    for _ in range(3):
+        assert stream.poll_once() == 3
+    assert all(len(batch) <= source.max_tickers for batch in source.requested)
+    # 3 putaran x 3 ticker menjangkau seluruh 8 ticker (tidak ada yang tertinggal di ekor)
+    assert set(stream.latest_prices(tickers)) == set(tickers)
@@ -1,24 +1,34 @@
-import pandas as pd
-import numpy as np
-import yfinance as yf
+import os
+import json
 import streamlit as st
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+from candle_store import get_candles, load_candles, store_age, update_candles_many
+from data_provider import get_provider
+from telemetry import span, timed
+from shared_cache import cached
 
-COINS = {
-    "BTC-USD": "Bitcoin",
-    "ETH-USD": "Ethereum",
-    "DOGE-USD": "Dogecoin",
-    "SHIB-USD": "Shiba Inu", 
-    "FLOKI-USD": "Floki",
-}
+# Universe koin dibaca dari file konfigurasi (default coins.json di root repo):
+#   {"featured": [ticker, ...], "coins": [{"ticker": ..., "name": ..., "icon": ...}, ...]}
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COINS_CONFIG = os.environ.get("COINS_CONFIG", os.path.join(BASE_DIR, 'coins.json'))
 
-COIN_ICONS = {
-    "BTC-USD": "https://s2.coinmarketcap.com/static/img/coins/64x64/1.png",
-    "ETH-USD": "https://s2.coinmarketcap.com/static/img/coins/64x64/1027.png",
-    "DOGE-USD": "https://s2.coinmarketcap.com/static/img/coins/64x64/74.png",
-    "SHIB-USD": "https://s2.coinmarketcap.com/static/img/coins/64x64/5994.png",
-    "FLOKI-USD": "https://s2.coinmarketcap.com/static/img/coins/64x64/10804.png"
-}
+# Jumlah kartu di bagian atas Home (tabel menampung seluruh universe)
+MAX_FEATURED = 5
+
+def load_universe(path=COINS_CONFIG):
+    """(COINS ticker->nama, COIN_ICONS ticker->url, FEATURED list ticker) dari file konfigurasi"""
+    with open(path, 'r') as f:
+        config = json.load(f)
+    coins, icons = {}, {}
+    for entry in config["coins"]:
+        ticker = entry["ticker"]
+        coins[ticker] = entry.get("name") or ticker.replace('-USD', '')
+        icons[ticker] = entry.get("icon", "")
+    featured = [t for t in config.get("featured", []) if t in coins] or list(coins)[:MAX_FEATURED]
+    return coins, icons, featured[:MAX_FEATURED]
+
+COINS, COIN_ICONS, FEATURED_COINS = load_universe()
 
 def format_big_number(num):
     """Format angka besar"""
@@ -44,118 +54,226 @@ def format_price(num):
     else:
         return f"${num:,.2f}"
 
-@st.cache_data(ttl=600)
+def build_market_table_html(data):
+    """Membangun HTML tabel market dari hasil get_market_summary"""
+    table_html = '<table class="styled-table">'
+    table_html += '<thead><tr><th style="text-align: left;">Asset</th><th style="text-align: right;">Price</th><th style="text-align: right;">24h Change</th><th style="text-align: right;">All-Time Low</th><th style="text-align: right;">Market Cap</th><th style="text-align: right;" title="Volume candle harian berjalan sejak 00:00 UTC">Volume (Today, UTC)</th></tr></thead>'
+    table_html += '<tbody>'
+
+    for item in data:
+        if item.get("Pending"):
+            # belum ada candle di store, refresh masih berjalan di background
+            table_html += f"""
+        <tr>
+            <td style="text-align: left;">
+                <img src="{item['Icon']}" style="width:20px; height:20px; border-radius:50%; vertical-align:middle; margin-right:5px;">
+                {item['Name']} <span class='ticker-symbol'>{item['Ticker'].replace('-USD','')}</span>
+            </td>
+            <td style="text-align: right;" colspan="5"><span class='stale-badge'>memuat</span></td>
+        </tr>"""
+            continue
+        change_color = "#00FF00" if item['Change'] >= 0 else "#FF4B4B"
+        stale = "<span class='stale-badge'>stale</span>" if item.get("Stale") else ""
+        table_html += f"""
+        <tr>
+            <td style="text-align: left;">
+                <img src="{item['Icon']}" style="width:20px; height:20px; border-radius:50%; vertical-align:middle; margin-right:5px;">
+                {item['Name']} <span class='ticker-symbol'>{item['Ticker'].replace('-USD','')}</span>
+            </td>
+            <td style="text-align: right;">{format_price(item['Price'])}{stale}</td>
+            <td style="text-align: right; color: {change_color};">{item['Change']:.2f}%</td>
+            <td style="text-align: right;">{format_price(item['ATL'])}</td>
+            <td style="text-align: right;">{format_big_number(item['MarketCap'])}</td>
+            <td style="text-align: right;">{format_big_number(item['Volume'])}</td>
+        </tr>"""
+
+    table_html += '</tbody></table>'
+    return table_html
+
+# Batas waktu (detik) menunggu metadata (circulating supply) sebelum tabel ditampilkan tanpa market cap
+TICKER_TIMEOUT = 8
+MAX_FETCH_WORKERS = 8
+
+# Ringkasan terakhir yang berhasil per ticker, dipakai saat refresh berikutnya gagal
+_last_good_summary = {}
+
+# Kolom yang bisa dipakai mengurutkan tabel market (label -> key baris)
+SORT_KEYS = {
+    "Market Cap": "MarketCap",
+    "Price": "Price",
+    "24h Change": "Change",
+    "Volume (Today, UTC)": "Volume",
+    "Name": "Name",
+}
+
+def _summary_row(ticker, name, hist, info):
+    """Satu baris ringkasan dari candle harian (+ info provider jika ada)"""
+    if hist is None or len(hist) < 2:
+        return None
+
+    # logika Fallback Harga (Jika info kosong, ambil dari history)
+    current_price = info.get('currentPrice') or info.get('regularMarketPrice') or hist['Close'].iloc[-1]
+    prev_close = info.get('previousClose') or info.get('regularMarketPreviousClose') or hist['Close'].iloc[-2]
+
+    # Hitung Change %
+    if prev_close and prev_close > 0:
+        change_pct = ((current_price - prev_close) / prev_close) * 100
+    else:
+        change_pct = 0.0
+
+    # Ambil Market Cap & Volume
+    # (tanpa info provider, volume = candle harian berjalan sejak 00:00 UTC, bukan volume 24 jam bergulir)
+    market_cap = info.get('marketCap', 0)
+    volume = info.get('volume24Hr', 0) or info.get('volume', 0) or hist['Volume'].iloc[-1]
+    valid_lows = hist.loc[hist['Low'] > 0, 'Low']
+    if not valid_lows.empty:
+        atl = valid_lows.min()
+    else:
+        atl = 0
+
+    return {
+        "Ticker": ticker,
+        "Name": name,
+        "Icon": COIN_ICONS.get(ticker, ""),
+        "Price": current_price,
+        "Change": change_pct,
+        "ATL": atl,
+        "MarketCap": market_cap,
+        "Volume": volume,
+        "Stale": False,
+    }
+
+def _pending_row(ticker, name):
+    """Baris sementara untuk ticker yang belum punya candle (refresh pertamanya belum selesai)"""
+    return {
+        "Ticker": ticker,
+        "Name": name,
+        "Icon": COIN_ICONS.get(ticker, ""),
+        "Price": 0,
+        "Change": 0.0,
+        "ATL": 0,
+        "MarketCap": 0,
+        "Volume": 0,
+        "Stale": False,
+        "Pending": True,
+    }
+
+def _fetch_coin_summary(ticker, name):
+    """Mengambil ringkasan satu koin (info + history dari store)"""
+    # mengambil info dengan error handling
+    try:
+        with span("summary.info"):
+            info = get_provider().info(ticker) or {}
+    except:
+        info = {}
+
+    # mengambil history dari store lokal (hanya candle baru yang didownload)
+    with span("summary.history"):
+        hist = get_candles(ticker, interval="1d")
+
+    return _summary_row(ticker, name, hist, info)
+
+@cached(ttl=86400)
+def get_circulating_supply(ticker):
+    """Circulating supply (berubah lambat, cache 1 hari); market cap = supply x harga terbaru"""
+    info = get_provider().info(ticker) or {}
+    supply = info.get('circulatingSupply')
+    price = info.get('currentPrice') or info.get('regularMarketPrice')
+    if not supply and info.get('marketCap') and price:
+        supply = info['marketCap'] / price
+    return float(supply or 0)
+
+def _fetch_supplies(tickers):
+    """Supply semua ticker secara paralel, dibatasi TICKER_TIMEOUT (yang sudah di cache langsung kembali)"""
+    executor = ThreadPoolExecutor(max_workers=max(1, min(MAX_FETCH_WORKERS, len(tickers))))
+    futures = {ticker: executor.submit(get_circulating_supply, ticker) for ticker in tickers}
+    wait(futures.values(), timeout=TICKER_TIMEOUT)
+    # Jangan tunggu ticker yang lambat; sisanya dicoba lagi di refresh berikutnya
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    supplies = {}
+    for ticker, future in futures.items():
+        if future.done() and not future.cancelled() and future.exception() is None:
+            supplies[ticker] = future.result()
+    return supplies
+
+# Cache bersama antar replika (SQLite lokal): hanya satu proses per host yang refresh ke Yahoo
+@cached(ttl=600)
+@timed("summary.total")
 def get_market_summary():
-    """Mengambil data dan waktu pengambilan data"""
+    """Ringkasan seluruh universe. Candle di-refresh per ticker di pool terbatas (store tertua dulu);
+    ticker yang belum punya data tetap tampil sebagai baris "memuat", tidak hilang dari tabel"""
     fetch_time = datetime.now().strftime("%H:%M:%S")
-    summary_data = []
+    tickers = list(COINS)
 
+    with span("summary.history"):
+        candles, failed = update_candles_many(tickers, interval="1d")
+    with span("summary.info"):
+        supplies = _fetch_supplies(tickers)
+
+    summary_data = []
     for ticker, name in COINS.items():
-        try:
-            t = yf.Ticker(ticker)
-            
-            # mengambil info dengan error handling
-            try:
-                info = t.info
-            except:
-                info = {}
-
-            # mengambil history
-            hist = t.history(period="max", interval="1d")
-            
-            if hist.empty:
-                continue
-
-            # logika Fallback Harga (Jika info kosong, ambil dari history)
-            current_price = info.get('currentPrice') or info.get('regularMarketPrice') or hist['Close'].iloc[-1]
-            prev_close = info.get('previousClose') or info.get('regularMarketPreviousClose') or hist['Close'].iloc[-2]
-            
-            # Hitung Change %
-            if prev_close and prev_close > 0:
-                change_pct = ((current_price - prev_close) / prev_close) * 100
+        row = _summary_row(ticker, name, candles.get(ticker), {})
+        if row is not None:
+            if supplies.get(ticker):
+                row["MarketCap"] = supplies[ticker] * row["Price"]
+            if ticker in failed:
+                # refresh gagal, harga dari store lokal
+                row["Stale"] = True
             else:
-                change_pct = 0.0
-
-            # Ambil Market Cap & Volume
-            market_cap = info.get('marketCap', 0)
-            volume = info.get('volume24Hr', 0) or info.get('volume', 0)
-            if not hist.empty:
-                valid_lows = hist.loc[hist['Low'] > 0, 'Low']
-                if not valid_lows.empty:
-                    atl = valid_lows.min()
-                else:
-                    atl = 0
-            else:
-                atl = 0
-
-            summary_data.append({
-                "Ticker": ticker,
-                "Name": name,
-                "Icon": COIN_ICONS.get(ticker, ""),
-                "Price": current_price,
-                "Change": change_pct,
-                "ATL": atl,
-                "MarketCap": market_cap,
-                "Volume": volume,
-            })
+                _last_good_summary[ticker] = row
+        elif ticker in _last_good_summary:
+            row = dict(_last_good_summary[ticker], Stale=True)
+        else:
+            row = _pending_row(ticker, name)
+        summary_data.append(row)
 
-        except Exception as e:
-            print(f"Error fetching data for {ticker}: {e}")
-            continue
-    
     return summary_data, fetch_time
 
-@st.cache_data(ttl=3600)
-def get_data_with_indikacators(ticker, start, end, interval):
-    """Mengambil data historis dan melakukan feature engineering dengan aman"""
-    try:
-        # PERBAIKAN MLOps: Gunakan Ticker().history() karena lebih stabil dari download()
-        t = yf.Ticker(ticker)
-        df = t.history(start=start, end=end, interval=interval)
-
-        if df is None or df.empty:
-            return pd.DataFrame()
-
-        # Penting untuk Plotly/Streamlit: Buang zona waktu (timezone) agar tidak error saat di-plot
-        if df.index.tz is not None:
-            df.index = df.index.tz_localize(None)
-
-        # Pastikan kolom yang dibutuhkan tersedia sebelum kalkulasi
-        required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
-        if not all(col in df.columns for col in required_cols):
-            return pd.DataFrame()
-
-        # Features engineering
-        df['Log_Ret'] = np.log(df['Close'] / df['Close'].shift(1))
-
-        # RSI (momentum)
-        delta = df['Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # MACD (trend)
-        ema12 = df['Close'].ewm(span=12, adjust=False).mean()
-        ema26 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = ema12 - ema26
-        df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-
-        # ATR (volatilitas)
-        high_low = df['High'] - df['Low']
-        high_close = np.abs(df['High'] - df['Close'].shift(1))
-        low_close = np.abs(df['Low'] - df['Close'].shift(1))
-
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
-
-        df['ATR'] = true_range.rolling(window=14).mean()
-
-        # Buang baris kosong akibat shifting
-        df.dropna(inplace=True)
-        
-        return df
-
-    except Exception as e:
-        print(f"Error mengambil data {ticker}: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+def sort_and_page(data, sort_by="MarketCap", descending=True, page=1, page_size=25):
+    """Urutkan baris di server lalu ambil satu halaman -> (baris halaman itu, jumlah halaman)"""
+    total_pages = max(1, -(-len(data) // page_size))
+    page = min(max(1, page), total_pages)
+    if sort_by == "Name":
+        key = lambda row: row["Name"].lower()
+    else:
+        key = lambda row: row.get(sort_by) or 0
+    ordered = sorted(data, key=key, reverse=descending)
+    return ordered[(page - 1) * page_size:page * page_size], total_pages
+
+# Store dianggap "hangat" jika di-refresh dalam rentang ini (detik); quote dibaca tanpa jaringan
+QUOTE_MAX_AGE = 300
+
+def _quote_from_store(ticker):
+    """Harga terakhir & perubahan dari store lokal jika baru saja di-refresh oleh summary"""
+    age = store_age(ticker, "1d")
+    if age is None or age > QUOTE_MAX_AGE:
+        return None
+    hist = load_candles(ticker, "1d")
+    if len(hist) < 2:
+        return None
+    price, prev_close = hist['Close'].iloc[-1], hist['Close'].iloc[-2]
+    change_pct = ((price - prev_close) / prev_close) * 100 if prev_close > 0 else 0.0
+    return {"Ticker": ticker, "Price": price, "Change": change_pct}
+
+@st.cache_data(ttl=60)
+def get_quote(ticker):
+    """Harga terkini satu ticker, tanpa mengambil data koin lain"""
+    with span("quote.total"):
+        quote = _quote_from_store(ticker)
+        if quote is not None:
+            return quote
+
+        # Store dingin: ambil hanya ticker ini (info + candle baru)
+        try:
+            row = _fetch_coin_summary(ticker, COINS.get(ticker, ticker))
+        except Exception as e:
+            print(f"Error fetching quote for {ticker}: {e}")
+            row = None
+
+        if row is None:
+            row = _last_good_summary.get(ticker)
+        if row is not None:
+            _last_good_summary[ticker] = row
+            return {"Ticker": ticker, "Price": row["Price"], "Change": row["Change"]}
+        return None